@@ -0,0 +1,74 @@
+import importlib.util
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+# How a worker reuses database connections (DB_POOL):
+#   persistent - each worker thread keeps its own connection for
+#                conn_max_age seconds, checked before reuse
+#   native     - Django's psycopg (3) pool, shared by the threads of a
+#                worker process; connections go back to it after each request
+#   external   - connect through a local pooler such as PgBouncer in
+#                transaction mode, which owns the TLS connections upstream
+POOL_MODES = ("persistent", "native", "external")
+
+
+def is_postgresql(settings_dict):
+    return settings_dict["ENGINE"].startswith("django.db.backends.postgresql")
+
+
+def has_native_pool():
+    # psycopg_pool only works with psycopg 3, not the psycopg2 in requirements.txt
+    return all(importlib.util.find_spec(name) is not None for name in ("psycopg", "psycopg_pool"))
+
+
+def database_settings(
+    url,
+    pool="persistent",
+    *,
+    conn_max_age=600,
+    ssl_require=None,
+    min_size=2,
+    max_size=4,
+    timeout=10,
+    max_idle=300,
+):
+    """A ``DATABASES`` entry for ``url`` that reuses connections the ``pool`` way.
+
+    ``min_size``, ``max_size``, ``timeout`` and ``max_idle`` size the native
+    pool of a single worker process. TLS is required from PostgreSQL unless
+    ``ssl_require`` says otherwise or the connection goes through a local
+    pooler; SQLite never gets SSL options.
+    """
+    if pool not in POOL_MODES:
+        raise ImproperlyConfigured(f"DB_POOL must be one of {', '.join(POOL_MODES)}, not {pool!r}")
+    settings_dict = dj_database_url.parse(url)
+    postgresql = is_postgresql(settings_dict)
+    if pool != "persistent" and not postgresql:
+        raise ImproperlyConfigured(f"DB_POOL={pool} needs a PostgreSQL DATABASE_URL")
+    if pool == "native" and not has_native_pool():
+        raise ImproperlyConfigured('DB_POOL=native needs psycopg 3: pip install "psycopg[binary,pool]"')
+    if ssl_require is None:
+        ssl_require = pool != "external"
+
+    settings_dict["CONN_HEALTH_CHECKS"] = True
+    settings_dict["CONN_MAX_AGE"] = conn_max_age
+    options = settings_dict.setdefault("OPTIONS", {})
+    if postgresql and ssl_require:
+        options["sslmode"] = "require"
+    if pool == "native":
+        # The pool decides when connections close; Django must hand them
+        # back after every request
+        settings_dict["CONN_MAX_AGE"] = 0
+        options["pool"] = {
+            "min_size": min_size,
+            "max_size": max_size,
+            "timeout": timeout,
+            "max_idle": max_idle,
+        }
+    elif pool == "external":
+        # Transaction pooling hands each transaction a different server
+        # connection, which server-side cursors do not survive
+        settings_dict["DISABLE_SERVER_SIDE_CURSORS"] = True
+    return settings_dict
+
@@ -0,0 +1,450 @@
+import atexit
+import contextvars
+import hmac
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Minutes of per-minute event buckets kept for the *_per_minute gauges
+RATE_WINDOW = 5
+# Events always reported as <name>_per_minute, even before the first one
+RATE_EVENTS = ("registrations", "course_approvals")
+# Counters of exited processes, folded together by MetricsRegistry.compact()
+AGGREGATE_FILE = "metrics-aggregate.json"
+COMPACT_LOCK = ".compact.lock"
+STALE_LOCK_SECONDS = 60
+_PROCESS_FILE = re.compile(r"^metrics-(\d+)(?:-[0-9a-f]+)?\.json$")
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _empty_snapshot():
+    return {"counters": {}, "histograms": {}, "events": {}}
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(directory, name, data):
+    # Write then rename so a scrape never reads a half-written file
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, directory / name)
+
+
+def _process_exited(pid):
+    if os.name == "nt" or pid <= 0:
+        # os.kill() terminates processes on Windows; pid 0 is not a process
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # alive, but owned by another user
+    return False
+
+
+def _add_snapshot(total, snapshot, oldest_minute):
+    """Add ``snapshot`` into ``total`` in place, dropping events before ``oldest_minute``."""
+    for key, value in snapshot["counters"].items():
+        total["counters"][key] = total["counters"].get(key, 0) + value
+    for key, histogram in snapshot["histograms"].items():
+        merged = total["histograms"].setdefault(
+            key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+        )
+        merged["buckets"] = [a + b for a, b in zip(merged["buckets"], histogram["buckets"])]
+        merged["sum"] += histogram["sum"]
+        merged["count"] += histogram["count"]
+    for name, buckets in snapshot["events"].items():
+        merged = total["events"].setdefault(name, {})
+        for minute, count in buckets.items():
+            if int(minute) >= oldest_minute:
+                merged[str(minute)] = merged.get(str(minute), 0) + count
+
+
+class MetricsRegistry:
+    """Counters, histograms and per-minute event rates for this process.
+
+    Every process writes its values to ``METRICS_DIR/metrics-<pid>-<id>.json``
+    (atomically, at most every METRICS_FLUSH_INTERVAL seconds) and a scrape
+    sums the files of all processes, so gunicorn workers report as one app.
+    The random id keeps a recycled pid from overwriting an old file. Files of
+    exited processes are folded into ``metrics-aggregate.json`` by the next
+    scrape, so their counters keep counting without the files piling up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_flush = 0.0
+        self._file_name = self._new_file_name()
+        self.reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    @staticmethod
+    def _new_file_name():
+        return f"metrics-{os.getpid()}-{uuid.uuid4().hex[:12]}.json"
+
+    def _after_fork(self):
+        # What the parent counted is reported by the parent's own file
+        self._lock = threading.Lock()
+        self._file_name = self._new_file_name()
+        self._next_flush = 0.0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(float)
+            self.histograms = {}
+            self.events = defaultdict(lambda: defaultdict(int))
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self.counters[_key(name, labels)] += amount
+        self.maybe_flush()
+
+    def event(self, name, amount=1):
+        """Count ``amount`` occurrences of ``name`` towards its per-minute rate."""
+        minute = int(time.time() // 60)
+        with self._lock:
+            self.counters[_key(f"{name}_total", {})] += amount
+            buckets = self.events[name]
+            buckets[minute] += amount
+            for old in [m for m in buckets if m < minute - RATE_WINDOW]:
+                del buckets[old]
+        self.maybe_flush()
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.setdefault(
+                key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            )
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {key: dict(h, buckets=list(h["buckets"])) for key, h in self.histograms.items()},
+                "events": {name: dict(buckets) for name, buckets in self.events.items()},
+            }
+
+    def directory(self):
+        path = getattr(settings, "METRICS_DIR", "")
+        return Path(path) if path else None
+
+    def maybe_flush(self):
+        if time.monotonic() >= self._next_flush:
+            self.flush()
+
+    def flush(self):
+        directory = self.directory()
+        self._next_flush = time.monotonic() + getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+        if directory is None:
+            return
+        snapshot = self.snapshot()
+        # Commands that recorded nothing leave no file behind
+        if not any(snapshot.values()) and not (directory / self._file_name).exists():
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_json(directory, self._file_name, snapshot)
+
+    def compact(self):
+        """Fold the files of exited processes into the aggregate file.
+
+        Runs under a lock file so concurrent scrapes never fold a file twice;
+        a scrape that finds the lock taken just skips compacting.
+        """
+        directory = self.directory()
+        if directory is None or not directory.is_dir():
+            return
+        lock = directory / COMPACT_LOCK
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            try:
+                # Left behind by a scrape that died while compacting
+                if time.time() - lock.stat().st_mtime > STALE_LOCK_SECONDS:
+                    lock.unlink()
+            except OSError:
+                pass
+            return
+        try:
+            aggregate = _read_json(directory / AGGREGATE_FILE) or _empty_snapshot()
+            folded = set(aggregate.get("folded", ()))
+            exited = []
+            for path in directory.glob("metrics-*.json"):
+                match = _PROCESS_FILE.match(path.name)
+                if not match or path.name in folded or not _process_exited(int(match[1])):
+                    continue
+                snapshot = _read_json(path)
+                if snapshot is not None:
+                    exited.append((path, snapshot))
+            if not exited:
+                return
+
+            oldest_minute = int(time.time() // 60) - RATE_WINDOW
+            for _, snapshot in exited:
+                _add_snapshot(aggregate, snapshot, oldest_minute)
+            # Recorded before deleting: a crash in between must not count twice
+            aggregate["folded"] = sorted(folded | {path.name for path, _ in exited})
+            _write_json(directory, AGGREGATE_FILE, aggregate)
+            for path, _ in exited:
+                path.unlink(missing_ok=True)
+            # Names are never reused, so deleted ones need not be remembered
+            aggregate["folded"] = [name for name in aggregate["folded"] if (directory / name).exists()]
+            _write_json(directory, AGGREGATE_FILE, aggregate)
+        finally:
+            lock.unlink(missing_ok=True)
+
+    def collect(self):
+        """Merged values of every process sharing METRICS_DIR."""
+        directory = self.directory()
+        if directory is None:
+            return [self.snapshot()]
+        self.flush()
+        self.compact()
+        aggregate = _read_json(directory / AGGREGATE_FILE)
+        folded = set(aggregate.get("folded", ())) if aggregate else set()
+        snapshots = [aggregate] if aggregate else []
+        for path in directory.glob("metrics-*.json"):
+            if path.name == AGGREGATE_FILE or path.name in folded:
+                continue
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        return snapshots
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush)
+
+
+def _merge(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    rates = defaultdict(int)
+    current_minute = int(time.time() // 60)
+    window = range(current_minute - RATE_WINDOW, current_minute)
+    for snapshot in snapshots:
+        for key, value in snapshot["counters"].items():
+            counters[key] += value
+        for key, histogram in snapshot["histograms"].items():
+            merged = histograms.setdefault(
+                key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            )
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], histogram["buckets"])]
+            merged["sum"] += histogram["sum"]
+            merged["count"] += histogram["count"]
+        for name, buckets in snapshot["events"].items():
+            # JSON turns the minute keys into strings
+            rates[name] += sum(n for minute, n in buckets.items() if int(minute) in window)
+    return counters, histograms, rates
+
+
+def _domain_gauges():
+    # Imported here so this module stays importable before apps load
+    from student.counters import get_counters
+
+    counters = get_counters()
+    return {
+        "student_course_pending": counters.get("pending_enrollments", 0),
+        "email_queue_depth": counters.get("email_queue_depth", 0),
+    }
+
+
+def render_metrics():
+    """Prometheus text exposition of every process's metrics plus domain gauges."""
+    counters, histograms, rates = _merge(registry.collect())
+    lines = []
+
+    def family(name, kind):
+        lines.append(f"# TYPE {name} {kind}")
+
+    by_name = defaultdict(list)
+    for key, value in sorted(counters.items()):
+        name, labels = json.loads(key)
+        by_name[name].append((labels, value))
+    for name, samples in by_name.items():
+        family(name, "counter")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+
+    # Hit ratio of every cache that reports cache_requests_total
+    cache_totals = defaultdict(lambda: {"hit": 0, "miss": 0})
+    for labels, value in by_name.get("cache_requests_total", []):
+        labels = dict(labels)
+        cache_totals[labels.get("cache")][labels.get("result")] += value
+    if cache_totals:
+        family("cache_hit_ratio", "gauge")
+        for cache, totals in sorted(cache_totals.items()):
+            requests = totals["hit"] + totals["miss"]
+            ratio = totals["hit"] / requests if requests else 0
+            lines.append(f"cache_hit_ratio{_labels([('cache', cache)])} {ratio:.4f}")
+
+    by_histogram = defaultdict(list)
+    for key, histogram in sorted(histograms.items()):
+        name, labels = json.loads(key)
+        by_histogram[name].append((labels, histogram))
+    for name, samples in by_histogram.items():
+        family(name, "histogram")
+        for labels, histogram in samples:
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                lines.append(f"{name}_bucket{_labels(labels + [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+
+    for name in sorted(set(rates) | set(RATE_EVENTS)):
+        family(f"{name}_per_minute", "gauge")
+        lines.append(f"{name}_per_minute {rates[name] / RATE_WINDOW:g}")
+
+    for name, value in _domain_gauges().items():
+        family(name, "gauge")
+        lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _authorized(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    header = request.headers.get("Authorization", "")
+    if token and hmac.compare_digest(header, f"Bearer {token}"):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+def metrics_view(request):
+    if not _authorized(request):
+        return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4")
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        # Fanned-out queries count from several threads at once
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+# The counter of the request being served. sync_to_async and async_to_sync
+# copy it into the threads they run code in, so a query counts towards
+# its request whichever thread's connection runs it.
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.add()
+    return execute(sql, params, many, context)
+
+
+def _instrument(connection):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _instrument_new_connection(sender, connection, **kwargs):
+    _instrument(connection)
+
+
+connection_created.connect(_instrument_new_connection)
+
+
+class MetricsMiddleware:
+    """Request latency histogram and DB query counter per URL name"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = _QueryCounter()
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            # Connections opened before this module was imported missed
+            # connection_created
+            for connection in connections.all(initialized_only=True):
+                _instrument(connection)
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.record(request, response, time.perf_counter() - started, queries.count)
+        return response
+
+    async def __acall__(self, request):
+        # Async views query from executor threads, not from this one; the
+        # counter travels there in the context
+        queries = _QueryCounter()
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.record(request, response, time.perf_counter() - started, queries.count)
+        return response
+
+    def record(self, request, response, elapsed, query_count):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unmatched"
+        if view != "metrics":
+            registry.observe(
+                "http_request_duration_seconds", elapsed,
+                view=view, method=request.method,
+            )
+            registry.inc(
+                "http_requests_total",
+                view=view, method=request.method, status=f"{response.status_code // 100}xx",
+            )
+            registry.inc("db_queries_total", query_count, view=view)
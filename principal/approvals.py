@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from metrics import registry
+from student.mail import queue_emails
+from student.models import StudentCourse
+from student.signals import enrollments_changed
+
+# Ids per UPDATE, well inside every backend's query parameter limit
+UPDATE_BATCH_SIZE = 1000
+
+DECISIONS = {
+    'approve': 'APPROVED',
+    'reject': 'REJECTED',
+}
+
+
+def decision_email(first_name, course_name, status):
+    """Subject and body telling a student their course request was decided."""
+    verb = 'approved' if status == 'APPROVED' else 'rejected'
+    subject = f'Your request for "{course_name}" was {verb}'
+    body = (
+        f'Hello {first_name},\n\n'
+        f'Your request to join "{course_name}" has been {verb} by the principal.\n'
+    )
+    return subject, body
+
+
+def matching_requests(ids=None, course_id=None, student_id=None):
+    """Course requests selected by id and/or narrowed by course or student."""
+    requests = StudentCourse.objects.all()
+    if ids is not None:
+        requests = requests.filter(id__in=ids)
+    if course_id:
+        requests = requests.filter(course_id=course_id)
+    if student_id:
+        requests = requests.filter(student_id=student_id)
+    return requests.order_by()
+
+
+def decide_requests(decision, ids=None, course_id=None, student_id=None):
+    """Approve or reject every pending request matching the filters.
+
+    The matching rows are locked, then moved in one UPDATE per
+    UPDATE_BATCH_SIZE rows with a shared approved_at timestamp; no model
+    instances are loaded. Returns per-status counts of
+    the matched requests before the update plus the number changed.
+    """
+    status = DECISIONS[decision]
+    requests = matching_requests(ids, course_id, student_id)
+    pending = requests.filter(status='PENDING')
+
+    with transaction.atomic():
+        counts = dict(requests.values_list('status').annotate(total=Count('id')))
+        # Plain tuples for the summaries and notification emails. The rows
+        # stay locked until commit, so a concurrent decision cannot change
+        # them between this read and the UPDATE below.
+        decided = list(pending.select_for_update(of=('self',)).values_list(
+            'id', 'student_id', 'student__email', 'student__first_name', 'course__course_name'
+        ))
+
+        changes = {'status': status}
+        if status == 'APPROVED':
+            changes['approved_at'] = timezone.now()
+        ids = [row[0] for row in decided]
+        updated = sum(
+            StudentCourse.objects.filter(id__in=ids[start:start + UPDATE_BATCH_SIZE]).update(**changes)
+            for start in range(0, len(ids), UPDATE_BATCH_SIZE)
+        )
+
+        if updated:
+            enrollments_changed.send(
+                sender=StudentCourse, student_ids={row[1] for row in decided}
+            )
+            notifications = []
+            for _, _, email, first_name, course_name in decided:
+                subject, body = decision_email(first_name, course_name, status)
+                notifications.append((subject, body, [email]))
+            queue_emails(notifications)
+            if status == 'APPROVED':
+                registry.event('course_approvals', updated)
+
+    return {
+        'updated': updated,
+        'status': status,
+        'counts': {code: counts.get(code, 0) for code, _ in StudentCourse.PURCHASE_STATUS},
+    }
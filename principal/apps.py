@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PrincipalConfig(AppConfig):
     name = 'principal'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,125 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from concurrency import gather_queries
+from student.models import Student, StudentCourse
+from . import views
+from .catalog import catalog_version, get_catalog_page, get_departments
+from .pagination import KeysetPaginator
+from .stats import get_dashboard_stats
+
+# Async twins of the read-heavy principal pages, served instead of the
+# sync views when ASYNC_VIEWS is on. Writes still go through the sync views.
+
+aget_dashboard_stats = sync_to_async(get_dashboard_stats)
+
+
+async def _use_async_user(request):
+    # Templates read request.user, which would load the user synchronously
+    request.user = await request.auser()
+
+
+@login_required
+async def principal_dashboard(request):
+    await _use_async_user(request)
+    if request.method == 'POST':
+        return await sync_to_async(views.principal_dashboard)(request)
+
+    async def pending_approvals():
+        approvals = StudentCourse.objects.filter(
+            status='PENDING'
+        ).select_related('student', 'course', 'course__department', 'student__std_dept').order_by('-purchased_at')
+        return [approval async for approval in approvals]
+
+    # The snapshot and the pending approvals are independent. Recent
+    # students are left out: the template does not show them, and unlike
+    # the sync view's lazy queryset a list would be fetched regardless.
+    stats, pending = await gather_queries(aget_dashboard_stats, pending_approvals)
+
+    context = {
+        'total_students': stats['total_students'],
+        'total_departments': stats['total_departments'],
+        'total_courses': stats['total_courses'],
+        'active_courses': stats['total_courses'],
+        'pending_requests': stats['pending_requests'],
+        'total_revenue': stats['total_revenue'],
+        'pending_approvals': pending,
+        'departments_with_courses': stats['departments_with_courses'],
+    }
+
+    return render(request, 'principal_dashboard.html', context)
+
+
+@login_required
+async def students_list(request):
+    await _use_async_user(request)
+    students = Student.objects.filter(role='STUDENT').select_related('std_dept')
+
+    search_query = request.GET.get('search', '').strip()
+    if search_query:
+        students = views.search_students(students, search_query)
+
+    paginator = KeysetPaginator(students, ('-date_joined', '-id'), views.STUDENTS_PER_PAGE)
+
+    @sync_to_async
+    def page():
+        return paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+
+    @sync_to_async
+    def total_students():
+        # A search counts its own matches; the full count is cached
+        if search_query:
+            return students.count()
+        return get_dashboard_stats()['total_students']
+
+    page_obj, total = await gather_queries(page, total_students)
+
+    context = {
+        'students': page_obj,
+        'search_query': search_query,
+        'total_students': total,
+    }
+
+    return render(request, 'principal_students_list.html', context)
+
+
+@login_required
+async def course_list(request):
+    await _use_async_user(request)
+    if request.method == 'POST':
+        return await sync_to_async(views.course_list)(request)
+
+    selected_department = request.GET.get('department', '')
+    selected_department = int(selected_department) if selected_department.isdigit() else None
+    search_query = request.GET.get('search', '')
+
+    @sync_to_async
+    def catalog_page():
+        page_obj = get_catalog_page(
+            department_id=selected_department,
+            search_query=search_query,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            per_page=views.COURSES_PER_PAGE,
+        )
+        # Resolve the (cached) total here rather than lazily in the template
+        return page_obj, page_obj.count, catalog_version()
+
+    departments, (page_obj, total_courses, version) = await gather_queries(
+        sync_to_async(get_departments), catalog_page
+    )
+
+    context = {
+        'courses': page_obj,
+        'departments': departments,
+        'selected_department': selected_department,
+        'search_query': search_query,
+        'total_courses': total_courses,
+        'catalog_version': version,
+    }
+
+    return render(request, 'principal_course_list.html', context)
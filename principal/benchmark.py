@@ -0,0 +1,279 @@
+import statistics
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.db.utils import ConnectionHandler
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from student.enrollment_map import invalidate_enrollment_maps
+from student.models import StudentCourse
+from .catalog import invalidate_catalog
+from .stats import invalidate_dashboard_stats
+
+# Most queries a cold (uncached) request to each view may run. They must
+# not grow with the amount of data, only with the code.
+QUERY_BUDGETS = {
+    'landing': 0,
+    'login': 0,
+    'registration': 1,
+    'logout': 4,
+    'purchase_course': 5,
+    'student_profile': 3,
+    'student_dashboard': 4,
+    'principal_dashboard': 6,
+    'add_course': 4,
+    'student_view': 6,
+    'students_list': 6,
+    'course_list': 5,
+    'import_students': 2,
+    'export_csv': 3,
+}
+
+# Views that write every row they are asked to, in batches: bulk decisions
+# run an UPDATE per UPDATE_BATCH_SIZE requests and an INSERT per bulk_create
+# batch of emails and summaries, so their queries are O(rows / batch).
+# They are profiled like the rest but have no fixed budget.
+BATCHED_VIEWS = {'bulk_decide_requests'}
+
+
+def view_cases(student, principal):
+    """``(url_name, user, url, data)`` for a request to every student and principal route.
+
+    ``data`` is POSTed when it is not None; the other routes are fetched
+    with a GET.
+    """
+    return [
+        ('landing', None, reverse('landing'), None),
+        ('login', None, reverse('login'), None),
+        ('registration', None, reverse('registration'), None),
+        ('logout', student, reverse('logout'), None),
+        ('purchase_course', student, reverse('purchase_course'), None),
+        ('student_profile', student, reverse('student_profile'), None),
+        ('student_dashboard', student, reverse('student_dashboard'), None),
+        ('principal_dashboard', principal, reverse('principal_dashboard'), None),
+        ('add_course', principal, reverse('add_course'), None),
+        ('student_view', principal, reverse('student_view', args=[student.pk]), None),
+        ('students_list', principal, reverse('students_list'), None),
+        ('course_list', principal, reverse('course_list'), None),
+        ('import_students', principal, reverse('import_students'), None),
+        ('export_csv', principal, reverse('export_csv', args=['revenue']), None),
+        ('bulk_decide_requests', principal, reverse('bulk_decide_requests'), bulk_decision_data(student)),
+    ]
+
+
+def bulk_decision_data(student):
+    # Approve everything pending for the course with the most pending
+    # requests, so the decision covers as many rows as the data has
+    course_id = (
+        StudentCourse.objects.filter(status='PENDING')
+        .values('course_id')
+        .annotate(pending=Count('id'))
+        .order_by('-pending')
+        .values_list('course_id', flat=True)
+        .first()
+    )
+    if course_id is None:
+        return {'decision': 'approve', 'scope': 'all', 'student_id': student.pk}
+    return {'decision': 'approve', 'scope': 'all', 'course_id': course_id}
+
+
+def _invalidate_caches(student):
+    # Cold requests rebuild every cache, exposing queries caching would hide
+    invalidate_dashboard_stats()
+    invalidate_catalog()
+    invalidate_enrollment_maps([student.pk])
+
+
+def _request(client, url, data=None):
+    if data is not None:
+        # Roll the POST back so every repeat changes the same rows
+        with transaction.atomic():
+            response = client.post(url, data)
+            transaction.set_rollback(True)
+        return response
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def profile_view(client, user, url, student, repeat=5, data=None):
+    """Query counts, latency percentiles (ms) and peak traced memory (KiB) for one URL.
+
+    ``data``, if given, is POSTed instead of fetching ``url``.
+    """
+    def login():
+        # logout ends the session, so log in again before every request
+        if user is not None:
+            client.force_login(user)
+
+    _invalidate_caches(student)
+    login()
+    # Count right away: later requests reset the connection's query log
+    with CaptureQueriesContext(connection) as cold:
+        response = _request(client, url, data)
+    cold_queries = len(cold)
+    login()
+    with CaptureQueriesContext(connection) as warm:
+        _request(client, url, data)
+    warm_queries = len(warm)
+
+    timings = []
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            login()
+            started = time.perf_counter()
+            _request(client, url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'cold_queries': cold_queries,
+        'warm_queries': warm_queries,
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[round(0.95 * (len(timings) - 1))],
+        'peak_kib': peak / 1024,
+    }
+
+
+def run_benchmark(student, principal, repeat=5):
+    client = Client()
+    return {
+        name: profile_view(client, user, url, student, repeat, data)
+        for name, user, url, data in view_cases(student, principal)
+    }
+
+
+def over_budget(results):
+    """``{url_name: (cold_queries, budget)}`` for views that exceed QUERY_BUDGETS.
+
+    BATCHED_VIEWS are not checked.
+    """
+    return {
+        name: (result['cold_queries'], QUERY_BUDGETS.get(name, 0))
+        for name, result in results.items()
+        if name not in BATCHED_VIEWS and result['cold_queries'] > QUERY_BUDGETS.get(name, 0)
+    }
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect (to the login page, say) is a failed request here
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def load_test(base_url, paths, cookie='', concurrency=16, requests=400, timeout=30):
+    """GET ``paths`` round-robin from ``concurrency`` threads against a running server.
+
+    Returns latency percentiles (ms), throughput and the number of
+    responses that were not 200.
+    """
+    opener = urllib.request.build_opener(_NoRedirect)
+    headers = {'Cookie': cookie} if cookie else {}
+
+    def fetch(index):
+        request = urllib.request.Request(base_url + paths[index % len(paths)], headers=headers)
+        started = time.perf_counter()
+        try:
+            with opener.open(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = None
+        return (time.perf_counter() - started) * 1000, status
+
+    for index in range(len(paths)):
+        fetch(index)  # warm up every worker's caches and imports
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    timings = sorted(ms for ms, _ in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, status in results if status != 200),
+        'rps': requests / elapsed if elapsed else 0,
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[round(0.95 * (len(timings) - 1))],
+        'p99_ms': timings[round(0.99 * (len(timings) - 1))],
+    }
+
+
+def connection_load_test(settings_dict, concurrency=8, requests=400, query='SELECT 1', alias='benchmark'):
+    """Run ``query`` as ``requests`` simulated requests from ``concurrency`` threads.
+
+    Each thread opens and releases the connection the way a request
+    thread does with ``settings_dict`` as its database, so persistence,
+    health checks and pooling all apply. Returns connection setup and
+    request latency (ms), throughput and how many connections were opened.
+    """
+    handler = ConnectionHandler({DEFAULT_DB_ALIAS: {}, alias: dict(settings_dict)})
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        if connection.alias == alias:
+            opened.append(connection)
+
+    def serve(thread_requests):
+        conn = handler[alias]
+        timings = []
+        try:
+            for _ in range(thread_requests):
+                conn.close_if_unusable_or_obsolete()  # request_started
+                started = time.perf_counter()
+                with conn.cursor() as cursor:
+                    connected = time.perf_counter()
+                    cursor.execute(query)
+                    cursor.fetchall()
+                finished = time.perf_counter()
+                conn.close_if_unusable_or_obsolete()  # request_finished
+                timings.append(((connected - started) * 1000, (finished - started) * 1000))
+        finally:
+            conn.close()
+        return timings
+
+    shares = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+    connection_created.connect(count, weak=False)
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = [timing for result in pool.map(serve, shares) for timing in result]
+        elapsed = time.perf_counter() - started
+        db_pool = getattr(handler[alias], 'pool', None)
+        # A pool hands out the same few connections; count those, not checkouts
+        connections = db_pool.get_stats()['connections_num'] if db_pool else len(opened)
+    finally:
+        connection_created.disconnect(count)
+        if getattr(handler[alias], 'pool', None):
+            handler[alias].close_pool()
+        handler.close_all()
+
+    setup = sorted(ms for ms, _ in timings)
+    total = sorted(ms for _, ms in timings)
+    return {
+        'requests': requests,
+        'connections': connections,
+        'rps': requests / elapsed if elapsed else 0,
+        'setup_mean_ms': statistics.fmean(setup),
+        'setup_p95_ms': setup[round(0.95 * (len(setup) - 1))],
+        'setup_share': sum(setup) / sum(total) if sum(total) else 0,
+        'p50_ms': statistics.median(total),
+        'p95_ms': total[round(0.95 * (len(total) - 1))],
+    }
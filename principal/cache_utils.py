@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import cache
+
+# Namespace versions never expire; snapshots keyed on them go stale by
+# simply bumping the version instead of hunting down every derived key.
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def get_version(namespace):
+    """Return the current cache version for ``namespace``."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed with a timestamp so an evicted counter never restarts at a
+        # value that an old snapshot was stored under.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every snapshot stored under the current ``namespace`` version."""
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+        return cache.get(key)
+
+
+def versioned_key(namespace, *parts):
+    """Build a cache key bound to the current ``namespace`` version."""
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{namespace}:v{get_version(namespace)}:{suffix}'
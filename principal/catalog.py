@@ -0,0 +1,139 @@
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from metrics import registry
+from .cache_utils import bump_version, get_version, versioned_key
+from .models import Department, AddOnCourse
+from .pagination import CursorEncoder, KeysetPage, KeysetPaginator
+
+CATALOG_NAMESPACE = 'principal:catalog'
+CATALOG_ORDERING = ('course_name', 'id')
+
+# Hit/miss counters for this process
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def catalog_cache_stats():
+    """Return this process's catalog cache hit/miss counters."""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_catalog_cache_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+def invalidate_catalog():
+    bump_version(CATALOG_NAMESPACE)
+
+
+def catalog_version():
+    """Current catalog version, for keying cached course card fragments."""
+    return get_version(CATALOG_NAMESPACE)
+
+
+def serialize_course(course):
+    department = course.department
+    return {
+        'id': course.id,
+        'course_id': course.course_id,
+        'course_name': course.course_name,
+        'course_description': course.course_description,
+        'course_price': course.course_price,
+        'formatted_price': course.formatted_price,
+        'created_at': course.created_at,
+        'department': {
+            'id': department.id,
+            'dept_name': department.dept_name,
+        } if department else None,
+    }
+
+
+def _cached(key, build):
+    value = cache.get(key)
+    if value is None:
+        _record('misses')
+        registry.inc('cache_requests_total', cache='catalog', result='miss')
+        value = build()
+        cache.set(key, value, settings.DATA_CACHE_TIMEOUT)
+    else:
+        _record('hits')
+        registry.inc('cache_requests_total', cache='catalog', result='hit')
+    return value
+
+
+def get_departments():
+    """All departments as plain dicts, cached until the catalog changes."""
+    key = versioned_key(CATALOG_NAMESPACE, 'departments')
+    return _cached(key, lambda: list(Department.objects.order_by('id').values('id', 'dept_name')))
+
+
+def catalog_queryset(department_id=None, search_query=''):
+    courses = AddOnCourse.objects.select_related('department')
+    if department_id:
+        courses = courses.filter(department_id=department_id)
+    if search_query:
+        courses = courses.filter(
+            Q(course_name__icontains=search_query) |
+            Q(course_id__icontains=search_query)
+        )
+    return courses
+
+
+def get_catalog_page(department_id=None, search_query='', after=None, before=None, per_page=5):
+    """One page of serialized courses, served from cache at steady state.
+
+    Entries are keyed on the catalog version, so any course or department
+    write makes every cached page and total unreachable at once. Cursors
+    are keyed by the keyset values they decode to: an invalid cursor shares
+    the entry of the page it falls back to instead of getting its own.
+    """
+    paginator = KeysetPaginator(
+        catalog_queryset(department_id, search_query),
+        CATALOG_ORDERING,
+        per_page,
+        count_key_prefix=versioned_key(CATALOG_NAMESPACE, 'count'),
+    )
+    before_values = paginator.decode_cursor(before) if before else None
+    # get_page ignores ``after`` when paging backwards
+    after_values = paginator.decode_cursor(after) if after and before_values is None else None
+    params = json.dumps(
+        [department_id or None, search_query, after_values, before_values, per_page],
+        cls=CursorEncoder,
+    )
+    digest = hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+    key = versioned_key(CATALOG_NAMESPACE, 'page', digest)
+
+    def build():
+        page = paginator.get_page(
+            after=after if after_values is not None else None,
+            before=before if before_values is not None else None,
+        )
+        return {
+            'object_list': [serialize_course(course) for course in page],
+            'has_next': page.has_next,
+            'has_previous': page.has_previous,
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+            'count': page.count,
+        }
+
+    return KeysetPage(**_cached(key, build))
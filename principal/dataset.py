@@ -0,0 +1,184 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from student.models import Student, StudentCourse
+from student.summary import rebuild_summaries
+from .catalog import invalidate_catalog
+from .models import AddOnCourse, Department
+from .stats import invalidate_dashboard_stats
+
+STATUS_WEIGHTS = (('APPROVED', 70), ('PENDING', 20), ('REJECTED', 10))
+PRICE_WEIGHTS = ((0, 15), (500, 30), (1000, 25), (1500, 15), (2500, 10), (5000, 5))
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil',
+    'Priya', 'Rahul', 'Riya', 'Rohan', 'Sneha', 'Tanvi', 'Vikram', 'Zara',
+)
+LAST_NAMES = (
+    'Sharma', 'Iyer', 'Nair', 'Patel', 'Reddy', 'Gupta', 'Menon', 'Das',
+    'Khan', 'Joshi', 'Rao', 'Singh', 'Verma', 'Pillai', 'Bose', 'Kulkarni',
+)
+HISTORY_DAYS = 3 * 365
+
+
+def _zipf_weights(count, rng, exponent=1.0):
+    # A few popular items and a long tail, in shuffled order
+    weights = [1 / (rank + 1) ** exponent for rank in range(count)]
+    rng.shuffle(weights)
+    return list(accumulate(weights))
+
+
+def _pick_courses(rng, course_ids, cum_weights, k):
+    if k * 2 > len(course_ids):
+        return rng.sample(course_ids, k)
+    picked = set()
+    while len(picked) < k:
+        picked.update(rng.choices(course_ids, cum_weights=cum_weights, k=k - len(picked)))
+    return list(picked)
+
+
+def _enrollments_for(rng, student, course_ids, cum_weights, k, now):
+    statuses, status_weights = zip(*STATUS_WEIGHTS)
+    span = max(int((now - student.date_joined).total_seconds()), 1)
+    rows = []
+    for course_id in _pick_courses(rng, course_ids, cum_weights, k):
+        status = rng.choices(statuses, status_weights)[0]
+        purchased_at = student.date_joined + timedelta(seconds=rng.randrange(span))
+        approved_at = None
+        if status == 'APPROVED':
+            approved_at = min(purchased_at + timedelta(hours=rng.randrange(1, 24 * 14)), now)
+        rows.append(StudentCourse(
+            student_id=student.pk,
+            course_id=course_id,
+            status=status,
+            purchased_at=purchased_at,
+            approved_at=approved_at,
+        ))
+    return rows
+
+
+def _next_generated_key(queryset, field, prefix, digits):
+    """One past the highest number in ``field`` values shaped ``prefix`` + ``digits`` digits."""
+    # Zero padding makes the highest generated key sort last
+    highest = (
+        queryset.filter(**{f'{field}__regex': rf'^{prefix}[0-9]{{{digits}}}$'})
+        .order_by(f'-{field}')
+        .values_list(field, flat=True)
+        .first()
+    )
+    return int(highest[len(prefix):]) + 1 if highest else 0
+
+
+def generate_dataset(departments=3, courses=10, students=20, enrollments=40,
+                     seed=0, password='password', batch_size=1000, progress=None):
+    """Insert a synthetic school with ``bulk_create`` and return the new rows' ids.
+
+    Output is deterministic for a given ``seed``. Department sizes and
+    course popularity follow a long-tailed distribution, enrollment counts
+    per student vary around ``enrollments / students``, and join/purchase/
+    approval dates are spread over the last three years. Every student
+    shares one precomputed password hash.
+
+    Students and their enrollments are written ``batch_size`` students at
+    a time, one transaction per batch, so memory stays flat at any scale.
+    ``progress(table, rows)`` is called after each insert. Bulk inserts
+    skip model signals, so the enrollment summaries, dashboard stats and
+    catalog are refreshed here.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    report = progress or (lambda table, rows: None)
+    # Offsets keep unique columns clear of rows from earlier runs, even
+    # after some of those rows were deleted
+    offset = _next_generated_key(Student.objects, 'std_reg_no', 'G', 9)
+    dept_offset = _next_generated_key(Department.objects, 'dept_name', 'Dept ', 6)
+    course_offset = _next_generated_key(AddOnCourse.objects, 'course_id', 'GEN', 6)
+
+    with transaction.atomic():
+        depts = Department.objects.bulk_create([
+            Department(dept_name=f'Dept {dept_offset + i:06d}', dept_description='Generated department')
+            for i in range(departments)
+        ])
+        report('departments', len(depts))
+        dept_weights = _zipf_weights(len(depts), rng, exponent=0.6)
+        prices, price_weights = zip(*PRICE_WEIGHTS)
+        course_rows = AddOnCourse.objects.bulk_create([
+            AddOnCourse(
+                course_id=f'GEN{course_offset + i:06d}',
+                course_name=f'Course {course_offset + i}',
+                department=rng.choices(depts, cum_weights=dept_weights)[0] if depts else None,
+                course_description='Generated course',
+                course_price=rng.choices(prices, price_weights)[0],
+            )
+            for i in range(courses)
+        ], batch_size=batch_size)
+        report('courses', len(course_rows))
+
+    course_ids = [course.pk for course in course_rows]
+    course_weights = _zipf_weights(len(course_ids), rng)
+    password_hash = make_password(password)
+    student_ids = []
+    created_enrollments = 0
+    remaining = min(enrollments, students * len(course_ids))
+
+    for start in range(0, students, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, students)):
+            n = offset + i
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            batch.append(Student(
+                username=f'gen{n}@example.com',
+                email=f'gen{n}@example.com',
+                password=password_hash,
+                first_name=first_name,
+                last_name=last_name,
+                std_reg_no=f'G{n:09d}',
+                std_dept=rng.choices(depts, cum_weights=dept_weights)[0] if depts else None,
+                std_year_of_admission=now.year - rng.randrange(4),
+                std_age=rng.randint(17, 24),
+                role='STUDENT',
+                date_joined=now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400)),
+            ))
+
+        with transaction.atomic():
+            Student.objects.bulk_create(batch, batch_size=batch_size)
+            report('students', len(batch))
+
+            enrollment_rows = []
+            for index, student in enumerate(batch):
+                # Spread what is left of the target over the remaining students
+                students_left = students - (start + index)
+                mean = remaining / students_left
+                k = min(len(course_ids), remaining, round(rng.expovariate(1 / mean)) if mean else 0)
+                # Never leave more than the remaining students can take
+                k = max(k, remaining - (students_left - 1) * len(course_ids))
+                remaining -= k
+                enrollment_rows.extend(
+                    _enrollments_for(rng, student, course_ids, course_weights, k, now)
+                )
+            # auto_now_add stamps every row with the time of the insert;
+            # put the generated purchase dates back afterwards
+            purchase_dates = [row.purchased_at for row in enrollment_rows]
+            StudentCourse.objects.bulk_create(enrollment_rows, batch_size=batch_size)
+            for row, purchased_at in zip(enrollment_rows, purchase_dates):
+                row.purchased_at = purchased_at
+            StudentCourse.objects.bulk_update(enrollment_rows, ['purchased_at'], batch_size=batch_size)
+            report('enrollments', len(enrollment_rows))
+            created_enrollments += len(enrollment_rows)
+
+            batch_ids = [student.pk for student in batch]
+            rebuild_summaries(batch_ids, batch_size=batch_size)
+        student_ids.extend(batch_ids)
+
+    invalidate_dashboard_stats()
+    invalidate_catalog()
+    return {
+        'departments': [dept.pk for dept in depts],
+        'courses': course_ids,
+        'students': student_ids,
+        'enrollments': created_enrollments,
+    }
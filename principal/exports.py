@@ -0,0 +1,94 @@
+import csv
+
+from django.db.models import Count, F, Q
+
+from student.models import Student, StudentCourse
+from .models import AddOnCourse
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the row back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _safe(value):
+    # Keep spreadsheet apps from evaluating cells as formulas
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def student_rows():
+    return (
+        Student.objects.filter(role='STUDENT')
+        .order_by('id')
+        .values_list(
+            'id', 'std_reg_no', 'first_name', 'last_name', 'email', 'std_phone_no',
+            'std_dept__dept_name', 'std_year_of_admission', 'std_age', 'date_joined',
+        )
+    )
+
+
+def enrollment_rows():
+    return (
+        StudentCourse.objects.order_by('id')
+        .values_list(
+            'id', 'student__std_reg_no', 'student__email', 'course__course_id',
+            'course__course_name', 'status', 'purchased_at', 'approved_at',
+        )
+    )
+
+
+def revenue_rows():
+    approved = Count('student_purchases', filter=Q(student_purchases__status='APPROVED'))
+    return (
+        AddOnCourse.objects.order_by('id')
+        .annotate(
+            approved=approved,
+            pending=Count('student_purchases', filter=Q(student_purchases__status='PENDING')),
+            revenue=approved * F('course_price'),
+        )
+        .values_list(
+            'course_id', 'course_name', 'department__dept_name', 'course_price',
+            'approved', 'pending', 'revenue',
+        )
+    )
+
+
+# name -> (header, queryset factory)
+EXPORTS = {
+    'students': (
+        ['id', 'std_reg_no', 'first_name', 'last_name', 'email', 'std_phone_no',
+         'department', 'std_year_of_admission', 'std_age', 'date_joined'],
+        student_rows,
+    ),
+    'enrollments': (
+        ['id', 'std_reg_no', 'email', 'course_id', 'course_name', 'status',
+         'purchased_at', 'approved_at'],
+        enrollment_rows,
+    ),
+    'revenue': (
+        ['course_id', 'course_name', 'department', 'course_price',
+         'approved_count', 'pending_count', 'revenue'],
+        revenue_rows,
+    ),
+}
+
+
+def iter_csv(name, out=None, chunk_size=CHUNK_SIZE):
+    """Yield the ``name`` export as CSV lines.
+
+    Rows come from ``values_list`` tuples fetched ``chunk_size`` at a time
+    with ``.iterator()``, so no model instances are built and memory stays
+    constant however many rows there are. Pass a file as ``out`` to have
+    each line written there instead of collected by the caller.
+    """
+    header, rows = EXPORTS[name]
+    writer = csv.writer(out or Echo())
+    yield writer.writerow(header)
+    for row in rows().iterator(chunk_size=chunk_size):
+        yield writer.writerow([_safe(value) for value in row])
@@ -0,0 +1,70 @@
+import re
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from student.models import OutboundEmail, ProfilePictureUpload, Student, StudentCourse
+from .catalog import CATALOG_ORDERING, catalog_queryset
+from .models import AddOnCourse, Department
+
+# Queries that read every row of a small table by design
+EXPECTED_SCANS = {
+    'principal_dashboard: department course counts': {Department._meta.db_table},
+}
+
+# Plan lines that read a whole table instead of an index
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)(?!\w)'),
+}
+
+
+def _sample_ids():
+    student_id = Student.objects.filter(role='STUDENT').values_list('id', flat=True).first()
+    department_id = Department.objects.values_list('id', flat=True).first()
+    return student_id or 0, department_id or 0
+
+
+def hot_queries():
+    """``(label, queryset)`` for the queries behind every busy page and worker."""
+    student_id, department_id = _sample_ids()
+    enrollments = StudentCourse.objects.filter(student_id=student_id)
+    return [
+        ('principal_dashboard: recent students',
+         Student.objects.filter(role='STUDENT').order_by('-date_joined')[:5]),
+        ('principal_dashboard: pending approvals',
+         StudentCourse.objects.filter(status='PENDING')
+         .select_related('student', 'course').order_by('-purchased_at')),
+        ('principal_dashboard: department course counts',
+         Department.objects.annotate(course_count=Count('addoncourse')).order_by('id')),
+        ('students_list: first page',
+         Student.objects.filter(role='STUDENT').order_by('-date_joined', '-id')[:26]),
+        ('student_view: enrollments',
+         enrollments.select_related('course').order_by('-purchased_at')),
+        ('course_list: catalog page',
+         catalog_queryset().order_by(*CATALOG_ORDERING)[:6]),
+        ('course_list: department page',
+         catalog_queryset(department_id).order_by(*CATALOG_ORDERING)[:6]),
+        ('course_list: pending per course',
+         AddOnCourse.objects.annotate(
+             pending=Count('student_purchases', filter=Q(student_purchases__status='PENDING'))
+         ).order_by(*CATALOG_ORDERING)[:6]),
+        ('student_dashboard: approved enrollments',
+         enrollments.filter(status='APPROVED').order_by()),
+        ('purchase_course: enrollment map',
+         enrollments.order_by().values_list('course_id', 'status')),
+        ('send_queued_mail: due emails',
+         OutboundEmail.objects.filter(
+             status__in=OutboundEmail.QUEUED_STATUSES, send_after__lte=timezone.now()
+         )[:50]),
+        ('process_media_uploads: pending uploads',
+         ProfilePictureUpload.objects.filter(status='PENDING')[:20]),
+    ]
+
+
+def seq_scans(plan, vendor, allowed=()):
+    """Tables read by sequential scan in an EXPLAIN ``plan``, minus ``allowed``."""
+    pattern = SEQ_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        return []
+    return sorted(set(pattern.findall(plan)) - set(allowed))
@@ -0,0 +1,118 @@
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from principal.benchmark import load_test
+from student.models import Student
+
+SERVERS = {
+    # name: (module, app, ASYNC_VIEWS, extra arguments)
+    'sync': ('gunicorn', 'student_management.wsgi', 'False', lambda port, workers: [
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+    ]),
+    'async': ('uvicorn', 'student_management.asgi:application', 'True', lambda port, workers: [
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+    ]),
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'Server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'Server did not listen on port {port} within {timeout}s')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync views under gunicorn with the async views under uvicorn: "
+        "start both servers with the same number of workers, load the principal "
+        "dashboard and list pages at the same concurrency and report latency and "
+        "throughput. Pass --sync-url/--async-url to load servers you started yourself."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=400, help='Requests per server')
+        parser.add_argument('--workers', type=int, default=2, help='Worker processes per server')
+        parser.add_argument('--username', help='Principal to log in as (default: the first one)')
+        parser.add_argument('--sync-url', help='Base URL of a running WSGI server with ASYNC_VIEWS off')
+        parser.add_argument('--async-url', help='Base URL of a running ASGI server with ASYNC_VIEWS on')
+
+    def handle(self, *args, **options):
+        principals = Student.objects.filter(role='PRINCIPAL').order_by('pk')
+        if options['username']:
+            principals = principals.filter(username=options['username'])
+        principal = principals.first()
+        if principal is None:
+            raise CommandError('No principal account to log in as')
+
+        paths = [reverse('principal_dashboard'), reverse('students_list'), reverse('course_list')]
+        client = Client()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            client.force_login(principal)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        results = {}
+        try:
+            for name, (module, app, async_views, arguments) in SERVERS.items():
+                base_url = options[f'{name}_url']
+                if base_url:
+                    results[name] = self.load(base_url.rstrip('/'), paths, cookie, options)
+                    continue
+                if importlib.util.find_spec(module) is None:
+                    raise CommandError(f'{module} is not installed; pass --{name}-url instead')
+                port = _free_port()
+                env = dict(os.environ, ASYNC_VIEWS=async_views)
+                process = subprocess.Popen(
+                    [sys.executable, '-m', module, app, *arguments(port, options['workers'])],
+                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+                try:
+                    _wait_for(port, process)
+                    results[name] = self.load(f'http://127.0.0.1:{port}', paths, cookie, options)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+        finally:
+            client.logout()
+
+        self.stdout.write(
+            f"{'server':<8}{'requests':>10}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<8}{result['requests']:>10}{result['errors']:>8}{result['rps']:>9.1f}"
+                f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+            )
+        if any(result['errors'] for result in results.values()):
+            raise CommandError('Some requests did not return 200')
+
+    def load(self, base_url, paths, cookie, options):
+        self.stdout.write(f'Loading {base_url} ...')
+        return load_test(
+            base_url, paths, cookie,
+            concurrency=options['concurrency'], requests=options['requests'],
+        )
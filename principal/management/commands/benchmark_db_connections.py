@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from database import database_settings, has_native_pool, is_postgresql
+from principal.benchmark import connection_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what connecting to the database costs each request under concurrent "
+        "load: a new connection per request, persistent health-checked connections, "
+        "the native psycopg pool (PostgreSQL with psycopg 3 only) and, with "
+        "--pooler-url, a local pooler such as PgBouncer. Works against SQLite too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Request threads')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per mode')
+        parser.add_argument('--database-url', default=settings.DATABASE_URL,
+                            help='Database to connect to (default: DATABASE_URL)')
+        parser.add_argument('--pooler-url', help='The same database through a local pooler')
+        parser.add_argument('--query', default='SELECT 1', help='SQL each request runs')
+
+    def handle(self, *args, **options):
+        url = options['database_url']
+        sizes = {
+            'min_size': settings.DB_POOL_MIN_SIZE,
+            'max_size': settings.DB_POOL_MAX_SIZE,
+            'timeout': settings.DB_POOL_TIMEOUT,
+            'max_idle': settings.DB_POOL_MAX_IDLE,
+        }
+        modes = {
+            'per-request': database_settings(url, conn_max_age=0, ssl_require=settings.DB_SSL_REQUIRE),
+            'persistent': database_settings(
+                url, conn_max_age=settings.DB_CONN_MAX_AGE, ssl_require=settings.DB_SSL_REQUIRE
+            ),
+        }
+        if not is_postgresql(modes['persistent']):
+            self.stdout.write('Skipping native: pooling needs PostgreSQL')
+        elif not has_native_pool():
+            self.stdout.write('Skipping native: install psycopg[binary,pool] to benchmark it')
+        else:
+            modes['native'] = database_settings(url, 'native', ssl_require=settings.DB_SSL_REQUIRE, **sizes)
+        if options['pooler_url']:
+            modes['external'] = database_settings(
+                options['pooler_url'], 'external', conn_max_age=settings.DB_CONN_MAX_AGE
+            )
+
+        results = {}
+        for name, settings_dict in modes.items():
+            self.stdout.write(f'Running {name} ...')
+            try:
+                results[name] = connection_load_test(
+                    settings_dict,
+                    concurrency=options['concurrency'],
+                    requests=options['requests'],
+                    query=options['query'],
+                    alias=f'benchmark-{name}',
+                )
+            except Exception as e:
+                raise CommandError(f'{name}: {e}') from e
+
+        self.stdout.write(
+            f"{'mode':<13}{'requests':>10}{'conns':>7}{'req/s':>9}"
+            f"{'setup ms':>10}{'setup p95':>11}{'setup %':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<13}{result['requests']:>10}{result['connections']:>7}{result['rps']:>9.1f}"
+                f"{result['setup_mean_ms']:>10.2f}{result['setup_p95_ms']:>11.2f}"
+                f"{result['setup_share']:>9.0%}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+            )
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from principal.benchmark import QUERY_BUDGETS, over_budget, run_benchmark
+from principal.catalog import invalidate_catalog
+from principal.dataset import generate_dataset
+from principal.stats import invalidate_dashboard_stats
+from student.enrollment_map import invalidate_enrollment_maps
+from student.models import Student
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset, request every student and principal page "
+        "and report query counts, p50/p95 latency and peak memory. All data is "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=10)
+        parser.add_argument('--courses', type=int, default=100)
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--enrollments', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per view')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+                ids = generate_dataset(
+                    options['departments'], options['courses'], options['students'],
+                    options['enrollments'], seed=options['seed'],
+                )
+                if not ids['students']:
+                    raise CommandError('--students must be at least 1')
+                principal = Student.objects.create_user(
+                    username='benchmark-principal@example.com',
+                    email='benchmark-principal@example.com',
+                    password=None,
+                    std_reg_no='BENCHPRIN01',
+                    role='PRINCIPAL',
+                )
+                student = Student.objects.get(pk=ids['students'][0])
+                results = run_benchmark(student, principal, repeat=options['repeat'])
+                raise Rollback
+        except Rollback:
+            # Drop anything cached from the rolled-back rows
+            invalidate_dashboard_stats()
+            invalidate_catalog()
+            invalidate_enrollment_maps([student.pk])
+
+        self.stdout.write(
+            f"{'view':<22}{'status':>7}{'cold q':>8}{'warm q':>8}{'budget':>8}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'peak KiB':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22}{result['status']:>7}{result['cold_queries']:>8}"
+                f"{result['warm_queries']:>8}{QUERY_BUDGETS.get(name, '-'):>8}"
+                f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['peak_kib']:>10.0f}"
+            )
+
+        exceeded = over_budget(results)
+        if exceeded:
+            for name, (queries, budget) in exceeded.items():
+                self.stderr.write(f"{name}: {queries} queries, budget {budget}")
+            raise CommandError('Query budget exceeded')
+        self.stdout.write(self.style.SUCCESS('All views within their query budgets.'))
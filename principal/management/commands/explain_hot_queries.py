@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from principal.hot_queries import EXPECTED_SCANS, SEQ_SCAN_PATTERNS, hot_queries, seq_scans
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the queries behind every busy view and flag sequential "
+        "scans. Planners prefer scans on tiny tables, so run it against "
+        "realistically sized data (see seed_load_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Use EXPLAIN ANALYZE (PostgreSQL only; executes the queries)',
+        )
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+        parser.add_argument(
+            '--fail-on-seq-scan', action='store_true',
+            help='Exit with an error if any query scans a table',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            self.stderr.write(f"Sequential-scan detection is not supported on {vendor}; printing plans only.")
+
+        explain_options = {'analyze': True} if options['analyze'] and vendor == 'postgresql' else {}
+        queries = hot_queries()
+        flagged = 0
+        for label, queryset in queries:
+            plan = queryset.explain(**explain_options)
+            scans = seq_scans(plan, vendor, EXPECTED_SCANS.get(label, ()))
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"SEQ SCAN  {label}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok        {label}"))
+            if scans or options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        self.stdout.write(f"{flagged} of {len(queries)} queries use a sequential scan.")
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError('Sequential scans found')
@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.exports import CHUNK_SIZE, EXPORTS, iter_csv
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV export of students, enrollments or per-course revenue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=sorted(EXPORTS))
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        except OSError as e:
+            raise CommandError(str(e))
+
+        rows = -1  # header
+        try:
+            for _ in iter_csv(options['export'], out=out, chunk_size=options['chunk_size']):
+                rows += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {rows} row(s) to {options['output']}"))
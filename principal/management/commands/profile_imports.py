@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a fresh serverless instance does before answering its first
+# request: import the WSGI app, then load the URLconf and every view
+CHILD_SCRIPT = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "import student_management.wsgi\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+    "print((time.perf_counter() - started) * 1000)\n"
+)
+
+
+def parse_importtime(output):
+    """``[(module, self_us, cumulative_us)]`` from ``python -X importtime`` stderr."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def by_package(rows):
+    """Self import time in ms and module count per top-level package."""
+    totals = defaultdict(lambda: [0.0, 0])
+    for module, self_us, _ in rows:
+        total = totals[module.split('.')[0]]
+        total[0] += self_us / 1000
+        total[1] += 1
+    return sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the WSGI app in a fresh interpreter under `python -X importtime` and "
+        "report the import time of every top-level package. Fails when the total or "
+        "any single package exceeds COLD_START_BUDGET_MS / COLD_START_MODULE_BUDGET_MS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--serverless', action='store_true', help='Profile with SERVERLESS=True')
+        parser.add_argument('--budget', type=float, default=settings.COLD_START_BUDGET_MS,
+                            help='Most milliseconds all imports together may take')
+        parser.add_argument('--module-budget', type=float, default=settings.COLD_START_MODULE_BUDGET_MS,
+                            help='Most milliseconds a single top-level package may take')
+        parser.add_argument('--top', type=int, default=20, help='Packages to list')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        if options['serverless']:
+            env['SERVERLESS'] = 'True'
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f'The app failed to start:\n{result.stderr[-2000:]}')
+
+        rows = parse_importtime(result.stderr)
+        packages = by_package(rows)
+        total_ms = sum(ms for _, (ms, _) in packages)
+
+        self.stdout.write(f"{'package':<32}{'modules':>9}{'ms':>10}{'share':>8}")
+        for name, (ms, modules) in packages[:options['top']]:
+            self.stdout.write(f'{name:<32}{modules:>9}{ms:>10.1f}{ms / total_ms:>8.0%}')
+        self.stdout.write(
+            f'{len(rows)} modules imported in {total_ms:.0f} ms '
+            f'(first request ready after {float(result.stdout.split()[-1]):.0f} ms wall time)'
+        )
+
+        over = [(name, ms) for name, (ms, _) in packages if ms > options['module_budget']]
+        for name, ms in over:
+            self.stderr.write(f'{name}: {ms:.1f} ms, budget {options["module_budget"]:g} ms')
+        if total_ms > options['budget']:
+            self.stderr.write(f'Total: {total_ms:.0f} ms, budget {options["budget"]:g} ms')
+        if over or total_ms > options['budget']:
+            raise CommandError('Cold-start import budget exceeded')
+        self.stdout.write(self.style.SUCCESS('Within the cold-start import budget.'))
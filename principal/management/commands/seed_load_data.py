@@ -0,0 +1,63 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with realistic synthetic departments, courses, "
+        "students and enrollments for load and performance testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=20)
+        parser.add_argument('--courses', type=int, default=400)
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--enrollments', type=int, default=50000)
+        parser.add_argument('--seed', type=int, default=0, help='Same seed, same data')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--password', default='password', help='Password shared by every generated student'
+        )
+
+    def handle(self, *args, **options):
+        if min(options['departments'], options['courses'], options['students'], options['enrollments']) < 0:
+            raise CommandError('Counts cannot be negative')
+
+        started = time.monotonic()
+        totals = Counter()
+        last_report = [started]
+
+        def progress(table, rows):
+            totals[table] += rows
+            now = time.monotonic()
+            # Report at most every few seconds on big runs
+            if now - last_report[0] >= 5:
+                last_report[0] = now
+                done = sum(totals.values())
+                self.stdout.write(
+                    f"  {totals['students']} students, {totals['enrollments']} enrollments "
+                    f"({done / (now - started):,.0f} rows/s)"
+                )
+
+        result = generate_dataset(
+            departments=options['departments'],
+            courses=options['courses'],
+            students=options['students'],
+            enrollments=options['enrollments'],
+            seed=options['seed'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+
+        elapsed = time.monotonic() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(result['departments'])} departments, {len(result['courses'])} courses, "
+            f"{len(result['students'])} students and {result['enrollments']} enrollments "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else rows:,.0f} rows/s)."
+        ))
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('principal', '0004_remove_addoncourse_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='addoncourse',
+            index=models.Index(fields=['department', 'course_name', 'id'], name='course_dept_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='addoncourse',
+            index=models.Index(fields=['course_name', 'id'], name='course_name_idx'),
+        ),
+    ]
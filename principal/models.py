@@ -14,6 +14,13 @@ class AddOnCourse(models.Model):
     course_description = models.TextField()
     course_price = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Catalog pages: optional department filter, ordered by name
+            models.Index(fields=['department', 'course_name', 'id'], name='course_dept_name_idx'),
+            models.Index(fields=['course_name', 'id'], name='course_name_idx'),
+        ]
     
 
     def __str__(self):
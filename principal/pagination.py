@@ -0,0 +1,164 @@
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+COUNT_CACHE_TIMEOUT = 5 * 60
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT, key_prefix='pagination:count'):
+    """COUNT(*) for ``queryset``, cached per distinct SQL statement.
+
+    ``key_prefix`` lets callers bind the cached totals to a versioned
+    namespace so writes can invalidate them before the timeout.
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode(), usedforsecurity=False).hexdigest()
+    key = f'{key_prefix}:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder trims datetimes to milliseconds, which would make
+    # the seek skip or repeat rows that differ only in microseconds.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset."""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor,
+                 paginator=None, count=None):
+        self.paginator = paginator
+        self._count = count
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def count(self):
+        """Total rows across all pages, from the paginator's cached count."""
+        if self._count is None:
+            self._count = self.paginator.count()
+        return self._count
+
+
+class KeysetPaginator:
+    """Seek-based paginator over a fixed, unique ordering.
+
+    Instead of OFFSET, each page filters on the ordering values of the last
+    (or first) row of the page before it, so page 1000 costs the same index
+    range scan as page 1. ``ordering`` must end in a unique field such as
+    ``id`` and every field in it must sort in the same direction.
+    """
+
+    def __init__(self, queryset, ordering, per_page, count_key_prefix='pagination:count'):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.count_key_prefix = count_key_prefix
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        if any(name.startswith('-') != self.descending for name in self.ordering):
+            raise ValueError('Keyset ordering fields must share one direction.')
+
+    def count(self):
+        """Total number of rows, cached instead of counted on every page."""
+        if not hasattr(self, '_count'):
+            self._count = cached_count(self.queryset, key_prefix=self.count_key_prefix)
+        return self._count
+
+    def _value(self, row, field):
+        return row[field] if isinstance(row, dict) else getattr(row, field)
+
+    def encode_cursor(self, row):
+        values = [self._value(row, field) for field in self.fields]
+        raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return the ordering values stored in ``cursor`` or None if invalid."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, ValueError, UnicodeDecodeError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        opts = self.queryset.model._meta
+        try:
+            return [opts.get_field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except ValidationError:
+            return None
+
+    def _seek(self, values, forward):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            clause = Q(**{f'{field}__{lookup}': values[i]})
+            for earlier, value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{earlier: value})
+            condition |= clause
+        return condition
+
+    def get_page(self, after=None, before=None):
+        """Return the page after cursor ``after``, before ``before`` or the first page."""
+        after_values = self.decode_cursor(after) if after else None
+        before_values = self.decode_cursor(before) if before else None
+
+        if before_values is not None:
+            reverse_ordering = [
+                name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering
+            ]
+            rows = list(
+                self.queryset.filter(self._seek(before_values, forward=False))
+                .order_by(*reverse_ordering)[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset.order_by(*self.ordering)
+            if after_values is not None:
+                queryset = queryset.filter(self._seek(after_values, forward=True))
+            rows = list(queryset[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = after_values is not None
+
+        return KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=self.encode_cursor(rows[-1]) if rows else None,
+            previous_cursor=self.encode_cursor(rows[0]) if rows else None,
+            paginator=self,
+        )
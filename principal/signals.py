@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from student.models import Student, StudentCourse
+from student.signals import enrollments_changed
+from .models import Department, AddOnCourse
+from .catalog import invalidate_catalog
+from .stats import invalidate_dashboard_stats
+
+
+@receiver(enrollments_changed)
+@receiver(post_save, sender=StudentCourse)
+@receiver(post_delete, sender=StudentCourse)
+@receiver(post_save, sender=AddOnCourse)
+@receiver(post_delete, sender=AddOnCourse)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def refresh_dashboard_stats(sender, **kwargs):
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def refresh_dashboard_stats_for_student(sender, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which the dashboard never shows
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=AddOnCourse)
+@receiver(post_delete, sender=AddOnCourse)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def refresh_catalog(sender, **kwargs):
+    invalidate_catalog()
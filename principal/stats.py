@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from metrics import registry
+from student.models import Student
+from .cache_utils import bump_version, versioned_key
+from .models import Department, AddOnCourse
+
+STATS_NAMESPACE = 'principal:dashboard_stats'
+
+
+def compute_dashboard_stats():
+    """Aggregate every dashboard counter straight from the database.
+
+    The query count is fixed (three) no matter how many departments,
+    courses or enrollments exist.
+    """
+    # Courses, pending requests and revenue in one conditional-aggregate pass
+    # over courses LEFT JOIN enrollments.
+    totals = AddOnCourse.objects.aggregate(
+        total_courses=Count('id', distinct=True),
+        pending_requests=Count(
+            'student_purchases', filter=Q(student_purchases__status='PENDING')
+        ),
+        total_revenue=Sum(
+            'course_price', filter=Q(student_purchases__status='APPROVED')
+        ),
+    )
+
+    # Per-department course counts, annotated instead of one COUNT per row
+    departments_with_courses = list(
+        Department.objects.annotate(course_count=Count('addoncourse'))
+        .order_by('id')
+        .values('id', 'dept_name', 'dept_description', 'course_count')
+    )
+
+    return {
+        'total_students': Student.objects.filter(role='STUDENT').count(),
+        'total_departments': len(departments_with_courses),
+        'total_courses': totals['total_courses'],
+        'pending_requests': totals['pending_requests'],
+        'total_revenue': totals['total_revenue'] or 0,
+        'departments_with_courses': departments_with_courses,
+    }
+
+
+def get_dashboard_stats():
+    """Return the cached dashboard snapshot, rebuilding it on a miss."""
+    key = versioned_key(STATS_NAMESPACE, 'snapshot')
+    stats = cache.get(key)
+    registry.inc('cache_requests_total', cache='dashboard_stats', result='miss' if stats is None else 'hit')
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(key, stats, settings.DATA_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    bump_version(STATS_NAMESPACE)
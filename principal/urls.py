@@ -1,11 +1,24 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Access policy read by middleware.AccessPolicyMiddleware
+required_role = 'PRINCIPAL'
+
+# ASYNC_VIEWS serves the dashboard and list pages from async views (under ASGI)
+if settings.ASYNC_VIEWS:
+    from . import async_views as read_views
+else:
+    read_views = views
+
 urlpatterns = [
-    path('principal-dashboard/', views.principal_dashboard, name='principal_dashboard'),
+    path('principal-dashboard/', read_views.principal_dashboard, name='principal_dashboard'),
     path('add-course/', views.Add_course, name='add_course'),
     path('user/<int:student_id>/', views.student_view, name='student_view'),
-    path('users-list/', views.students_list, name='students_list'),
-    path('course-list/', views.course_list, name='course_list'),
+    path('users-list/', read_views.students_list, name='students_list'),
+    path('users-import/', views.import_students_view, name='import_students'),
+    path('course-list/', read_views.course_list, name='course_list'),
+    path('exports/<slug:export>.csv', views.export_csv, name='export_csv'),
+    path('approvals/bulk/', views.bulk_decide_requests, name='bulk_decide_requests'),
 
 ]
\ No newline at end of file
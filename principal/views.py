@@ -1,12 +1,30 @@
+import io
+import sys
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Q
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils import timezone
-from django.core.paginator import Paginator
+from metrics import registry
 from student.models import Student, StudentCourse
+from student.mail import queue_email
+from student.importer import import_students
+from student.summary import get_summary
 from .models import Department, AddOnCourse
 from .form import AddOnCourseForm  
+from .stats import get_dashboard_stats
+from .pagination import KeysetPaginator
+from .catalog import catalog_version, get_catalog_page, get_departments
+from .approvals import DECISIONS, decide_requests, decision_email
+from .exports import EXPORTS, iter_csv
+
+STUDENTS_PER_PAGE = 25
+COURSES_PER_PAGE = 5
 
 @login_required
 def principal_dashboard(request):
@@ -18,7 +36,7 @@ def principal_dashboard(request):
         # Process course approval or rejection
         if action in ['approve_course', 'reject_course'] and approval_id:
             try:
-                approval = StudentCourse.objects.get(id=approval_id)
+                approval = StudentCourse.objects.select_related('course', 'student').get(id=approval_id)
                 if action == 'approve_course':
                     approval.status = 'APPROVED'
                     approval.approved_at = timezone.now()
@@ -27,6 +45,10 @@ def principal_dashboard(request):
                     approval.status = 'REJECTED'
                     messages.success(request, f'Course "{approval.course.course_name}" rejected for {approval.student.first_name}')
                 approval.save()
+                if approval.status == 'APPROVED':
+                    registry.event('course_approvals')
+                subject, body = decision_email(approval.student.first_name, approval.course.course_name, approval.status)
+                queue_email(subject, body, [approval.student.email])
             except StudentCourse.DoesNotExist:
                 messages.error(request, 'Approval request not found.')
         
@@ -43,15 +65,9 @@ def principal_dashboard(request):
         
         return redirect('principal_dashboard')
     
-    # Calculate dashboard statistics
-    total_students = Student.objects.filter(role='STUDENT').count()
-    total_departments = Department.objects.count()
-    total_courses = AddOnCourse.objects.count()
-    pending_requests = StudentCourse.objects.filter(status='PENDING').count()
-    
-    total_revenue = StudentCourse.objects.filter(status='APPROVED').aggregate(
-        total=Sum('course__course_price')
-    )['total'] or 0
+    # Dashboard counters come from a cached snapshot that is rebuilt only
+    # when students, courses, departments or enrollments change
+    stats = get_dashboard_stats()
     
     # Get recent student registrations
     recent_students = Student.objects.filter(
@@ -63,32 +79,73 @@ def principal_dashboard(request):
         status='PENDING'
     ).select_related('student', 'course', 'course__department', 'student__std_dept').order_by('-purchased_at')
     
-    # Prepare department data
-    departments_with_courses = []
-    departments = Department.objects.all()
-    
-    for dept in departments:
-        courses = AddOnCourse.objects.filter(department=dept)
-        departments_with_courses.append({
-            'id': dept.id,
-            'dept_name': dept.dept_name,
-            'dept_description': dept.dept_description,
-            'course_count': courses.count(),
-        })
-    
     context = {
-        'total_students': total_students,
-        'total_departments': total_departments,
-        'total_courses': total_courses,
-        'active_courses': total_courses,
-        'pending_requests': pending_requests,
-        'total_revenue': total_revenue,
+        'total_students': stats['total_students'],
+        'total_departments': stats['total_departments'],
+        'total_courses': stats['total_courses'],
+        'active_courses': stats['total_courses'],
+        'pending_requests': stats['pending_requests'],
+        'total_revenue': stats['total_revenue'],
         'recent_students': recent_students,
         'pending_approvals': pending_approvals,
-        'departments_with_courses': departments_with_courses,
+        'departments_with_courses': stats['departments_with_courses'],
     }
     
     return render(request, 'principal_dashboard.html', context)
+
+
+def _optional_id(value):
+    """``None`` for a missing id, the id as an int, or ``ValueError``."""
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+@login_required
+def bulk_decide_requests(request):
+    # Approve or reject many course requests in a single UPDATE
+    if request.method != 'POST':
+        return redirect('principal_dashboard')
+    
+    decision = request.POST.get('decision')
+    scope = request.POST.get('scope', 'selected')
+    try:
+        course_id = _optional_id(request.POST.get('course_id'))
+        student_id = _optional_id(request.POST.get('student_id'))
+    except ValueError:
+        messages.error(request, 'Invalid course or student.')
+        return redirect('principal_dashboard')
+    approval_ids = [i for i in request.POST.getlist('approval_ids') if i.isdigit()]
+    
+    if decision not in DECISIONS:
+        messages.error(request, 'Unknown bulk action.')
+    elif scope == 'selected' and not approval_ids:
+        messages.error(request, 'Please select at least one request.')
+    elif scope != 'selected' and not (course_id or student_id):
+        # Deciding every pending request in the system is never intended
+        messages.error(request, 'Choose a course or student to decide all of their requests.')
+    else:
+        result = decide_requests(
+            decision,
+            ids=approval_ids if scope == 'selected' else None,
+            course_id=course_id,
+            student_id=student_id,
+        )
+        skipped = sum(result['counts'].values()) - result['updated']
+        verb = 'approved' if result['status'] == 'APPROVED' else 'rejected'
+        messages.success(request, f'{result["updated"]} request(s) {verb}.')
+        if skipped:
+            messages.info(request, f'{skipped} request(s) were already decided and left unchanged.')
+    
+    if student_id:
+        return redirect('student_view', student_id=student_id)
+    if course_id:
+        return redirect('course_list')
+    return redirect('principal_dashboard')
+
+
 @login_required
 def course_list(request):
     # Handle course deletion
@@ -104,64 +161,119 @@ def course_list(request):
         return redirect('course_list')
     
     # Get all departments for filter dropdown
-    departments = Department.objects.all()
+    departments = get_departments()
     
     # Get filter parameters
-    selected_department = request.GET.get('department')
+    selected_department = request.GET.get('department', '')
+    selected_department = int(selected_department) if selected_department.isdigit() else None
     search_query = request.GET.get('search', '')
     
-    # Start with all courses
-    courses = AddOnCourse.objects.all().select_related('department').order_by('course_name')
-    
-    # Apply filters
-    if selected_department:
-        courses = courses.filter(department_id=selected_department)
-    
-    if search_query:
-        courses = courses.filter(
-            Q(course_name__icontains=search_query) |
-            Q(course_id__icontains=search_query)
-        )
-    
-    # Pagination
-    paginator = Paginator(courses, 5)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Seek-based page of serialized courses from the catalog cache
+    page_obj = get_catalog_page(
+        department_id=selected_department,
+        search_query=search_query,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        per_page=COURSES_PER_PAGE,
+    )
     
     context = {
         'courses': page_obj,
         'departments': departments,
         'selected_department': selected_department,
         'search_query': search_query,
-        'total_courses': paginator.count,
+        'total_courses': page_obj.count,
+        'catalog_version': catalog_version(),
     }
     
     return render(request, 'principal_course_list.html', context)
-@login_required
 
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'email', 'std_reg_no')
+
+
+def search_students(students, search_query):
+    # PostgreSQL serves substring matches from trigram indexes; elsewhere
+    # match prefixes as a range over the Lower() indexes on Student
+    if connection.vendor == 'postgresql':
+        query = Q()
+        for field in SEARCH_FIELDS:
+            query |= Q(**{f'{field}__icontains': search_query})
+        return students.filter(query)
+
+    prefix = search_query.lower()
+    # The first string past every string starting with prefix
+    upper = prefix[:-1] + chr(min(ord(prefix[-1]) + 1, sys.maxunicode))
+    query = Q()
+    for field in SEARCH_FIELDS:
+        query |= Q(**{f'{field}_lower__gte': prefix, f'{field}_lower__lt': upper})
+    return students.alias(
+        **{f'{field}_lower': Lower(field) for field in SEARCH_FIELDS}
+    ).filter(query)
+
+
+@login_required
 def students_list(request):  
     # Get all students
-    students = Student.objects.filter(role='STUDENT').select_related('std_dept').order_by('-date_joined')
+    students = Student.objects.filter(role='STUDENT').select_related('std_dept')
     
     # Apply search
-    search_query = request.GET.get('search', '')
+    search_query = request.GET.get('search', '').strip()
     if search_query:
-        students = students.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(std_reg_no__icontains=search_query)
-        )
+        students = search_students(students, search_query)
+    
+    # Keyset pagination: newest first, seeking past the last row shown
+    paginator = KeysetPaginator(students, ('-date_joined', '-id'), STUDENTS_PER_PAGE)
+    page_obj = paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
     
     context = {
-        'students': students,
+        'students': page_obj,
         'search_query': search_query,
-        'total_students': students.count(),
+        # A search counts its own matches; the full count is cached
+        'total_students': students.count() if search_query else get_dashboard_stats()['total_students'],
     }
     
     return render(request, 'principal_students_list.html', context)
 
 
+@login_required
+def import_students_view(request):
+    result = None
+    if request.method == 'POST':
+        upload = request.FILES.get('csv_file')
+        if not upload or not upload.name.lower().endswith('.csv'):
+            messages.error(request, 'Please choose a .csv file to import.')
+        else:
+            # Decode the upload as a stream so large files are never read whole
+            csv_file = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                # Hashed in this worker unless STUDENT_IMPORT_WORKERS opts into a pool
+                result = import_students(csv_file, workers=settings.STUDENT_IMPORT_WORKERS)
+            except (ValueError, UnicodeDecodeError) as e:
+                messages.error(request, f'Could not import file: {e}')
+            else:
+                if result['created']:
+                    messages.success(request, f'{result["created"]} student(s) imported successfully!')
+                if result['failed']:
+                    messages.warning(request, f'{result["failed"]} row(s) were rejected.')
+
+    return render(request, 'principal_import_students.html', {'result': result})
+
+
+@login_required
+def export_csv(request, export):
+    if export not in EXPORTS:
+        raise Http404('Unknown export')
+    # Rows are written to the client as they are read from the database
+    response = StreamingHttpResponse(iter_csv(export), content_type='text/csv')
+    filename = f'{export}-{timezone.localdate():%Y%m%d}.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 def Add_course(request):   
     # Check if departments exist
@@ -195,7 +307,7 @@ def student_view(request, student_id):
         
         if action in ['approve_purchase', 'reject_purchase'] and purchase_id:
             try:
-                purchase = StudentCourse.objects.get(id=purchase_id)
+                purchase = StudentCourse.objects.select_related('course', 'student').get(id=purchase_id)
                 if action == 'approve_purchase':
                     purchase.status = 'APPROVED'
                     purchase.approved_at = timezone.now()
@@ -204,6 +316,10 @@ def student_view(request, student_id):
                     purchase.status = 'REJECTED'
                     messages.success(request, f'Course "{purchase.course.course_name}" rejected for {purchase.student.first_name}')
                 purchase.save()
+                if purchase.status == 'APPROVED':
+                    registry.event('course_approvals')
+                subject, body = decision_email(purchase.student.first_name, purchase.course.course_name, purchase.status)
+                queue_email(subject, body, [purchase.student.email])
             except StudentCourse.DoesNotExist:
                 messages.error(request, 'Course purchase not found.')
         
@@ -217,13 +333,14 @@ def student_view(request, student_id):
         student=student
     ).select_related('course', 'course__department').order_by('-purchased_at')
     
-    # Separate courses by status
-    approved_courses = all_courses.filter(status='APPROVED')
-    pending_courses = all_courses.filter(status='PENDING')
-    rejected_courses = all_courses.filter(status='REJECTED')
+    # Separate courses by status from a single fetch
+    all_courses = list(all_courses)
+    approved_courses = [purchase for purchase in all_courses if purchase.status == 'APPROVED']
+    pending_courses = [purchase for purchase in all_courses if purchase.status == 'PENDING']
+    rejected_courses = [purchase for purchase in all_courses if purchase.status == 'REJECTED']
     
-    # Calculate total spent
-    total_spent = sum(purchase.course.course_price for purchase in approved_courses)
+    # Counters and total spent come from the maintained summary row
+    summary = get_summary(student)
     
     context = {
         'student': student,
@@ -231,10 +348,11 @@ def student_view(request, student_id):
         'approved_courses': approved_courses,
         'pending_courses': pending_courses,
         'rejected_courses': rejected_courses,
-        'total_spent': total_spent,
-        'approved_count': approved_courses.count(),
-        'pending_count': pending_courses.count(),
-        'rejected_count': rejected_courses.count(),
+        'total_spent': summary.approved_spend,
+        'total_count': summary.total_count,
+        'approved_count': summary.approved_count,
+        'pending_count': summary.pending_count,
+        'rejected_count': summary.rejected_count,
     }
     
     return render(request, 'principal_student_view.html', context)
\ No newline at end of file
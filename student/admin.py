@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student
+from .models import Student, OutboundEmail, ProfilePictureUpload, WorkflowCounter
 
 # Register your models here.
 
@@ -20,4 +20,40 @@ class StudentAdmin(admin.ModelAdmin):
     )
 
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'send_after',
+        'sent_at',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipients', 'subject')
+
+
+class ProfilePictureUploadAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'student',
+        'status',
+        'attempts',
+        'created_at',
+        'claimed_at',
+        'processed_at',
+    )
+    list_filter = ('status',)
+    raw_id_fields = ('student',)
+
+
+class WorkflowCounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'shard', 'value')
+    list_filter = ('name',)
+
+
 admin.site.register(Student, StudentAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+admin.site.register(ProfilePictureUpload, ProfilePictureUploadAdmin)
+admin.site.register(WorkflowCounter, WorkflowCounterAdmin)
@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import lazy
+
+from template_warmup import template_digest
+
+# (date, formatted string) for the last day rendered by this process
+_current_date = (None, "")
+
+
+def _formatted_current_date():
+    global _current_date
+    today = timezone.localdate() if settings.USE_TZ else date.today()
+    if _current_date[0] != today:
+        _current_date = (today, today.strftime("%d/%m/%Y"))
+    return _current_date[1]
+
+
+def current_date(request):
+    """Today's date in TIME_ZONE, only formatted if a template prints it"""
+    return {"current_date": lazy(_formatted_current_date, str)()}
+
+
+def fragment_cache(request):
+    """Timeout and version for {% cache %} fragments of the shared page chrome"""
+    return {
+        "fragment_timeout": settings.FRAGMENT_CACHE_TIMEOUT,
+        "fragment_version": template_digest(),
+    }
@@ -0,0 +1,53 @@
+import random
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import OutboundEmail, StudentCourse, WorkflowCounter
+
+PENDING_ENROLLMENTS = "pending_enrollments"
+EMAIL_QUEUE_DEPTH = "email_queue_depth"
+
+# Rows per counter. Each write locks one random shard until its
+# transaction commits, so up to this many writers proceed side by side.
+# recount() creates every shard, so a write is normally a single UPDATE.
+SHARDS = 16
+
+
+def adjust_counters(deltas):
+    """Add ``{name: delta}`` to the stored counters inside the caller's transaction."""
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        shard = random.randrange(SHARDS)
+        row = WorkflowCounter.objects.filter(name=name, shard=shard)
+        if not row.update(value=F("value") + delta):
+            try:
+                with transaction.atomic():
+                    WorkflowCounter.objects.create(name=name, shard=shard, value=delta)
+            except IntegrityError:
+                # Another process created it first
+                row.update(value=F("value") + delta)
+
+
+def get_counters():
+    return dict(
+        WorkflowCounter.objects.values("name").annotate(total=Sum("value")).values_list("name", "total")
+    )
+
+
+def recount():
+    """Reset every counter from a full count of the rows it tracks."""
+    totals = {
+        PENDING_ENROLLMENTS: StudentCourse.objects.filter(status="PENDING").count(),
+        EMAIL_QUEUE_DEPTH: OutboundEmail.objects.filter(status__in=OutboundEmail.QUEUED_STATUSES).count(),
+    }
+    with transaction.atomic():
+        WorkflowCounter.objects.filter(name__in=totals).delete()
+        # The total goes on shard 0, the other shards start at zero
+        WorkflowCounter.objects.bulk_create(
+            WorkflowCounter(name=name, shard=shard, value=value if shard == 0 else 0)
+            for name, value in totals.items()
+            for shard in range(SHARDS)
+        )
+    return totals
@@ -0,0 +1,70 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from principal.models import AddOnCourse
+from .models import Student, StudentCourse
+from .signals import enrollments_changed
+
+
+def _clean_pairs(pairs):
+    # Drop malformed ids and duplicates while keeping the caller's order
+    cleaned = {}
+    for student_id, course_id in pairs:
+        try:
+            cleaned[(int(student_id), int(course_id))] = None
+        except (TypeError, ValueError):
+            continue
+    return list(cleaned)
+
+
+def _insert_pending(cursor, pairs, purchased_at):
+    # Unknown students/courses are filtered out by the joins and existing
+    # (student, course) rows are skipped by the unique constraint, so the
+    # row count is exactly the number of new enrollments.
+    qn = connection.ops.quote_name
+    values = ", ".join(["(%s, %s)"] * len(pairs))
+    sql = (
+        f"INSERT INTO {qn(StudentCourse._meta.db_table)} "
+        f"({qn('student_id')}, {qn('course_id')}, {qn('status')}, {qn('purchased_at')}) "
+        f"SELECT v.column1, v.column2, 'PENDING', %s "
+        f"FROM (VALUES {values}) AS v "
+        f"JOIN {qn(Student._meta.db_table)} s ON s.{qn('id')} = v.column1 "
+        f"JOIN {qn(AddOnCourse._meta.db_table)} c ON c.{qn('id')} = v.column2 "
+        # SQLite needs a WHERE clause to tell the upsert apart from the join
+        f"WHERE 1 = 1 "
+        f"ON CONFLICT ({qn('student_id')}, {qn('course_id')}) DO NOTHING"
+    )
+    params = [purchased_at]
+    for student_id, course_id in pairs:
+        params.extend([student_id, course_id])
+    cursor.execute(sql, params)
+    return cursor.rowcount
+
+
+def bulk_enroll(pairs, batch_size=500):
+    """Create PENDING enrollments for ``(student_id, course_id)`` pairs.
+
+    Every batch is a single INSERT ... SELECT that skips duplicates at the
+    database level. Returns the exact number of enrollments created.
+    """
+    pairs = _clean_pairs(pairs)
+    if not pairs:
+        return 0
+
+    purchased_at = timezone.now()
+    created = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            created += _insert_pending(cursor, pairs[start:start + batch_size], purchased_at)
+        if created:
+            # Raw inserts bypass post_save, so tell listeners directly
+            enrollments_changed.send(
+                sender=StudentCourse,
+                student_ids={student_id for student_id, _ in pairs},
+            )
+    return created
+
+
+def enroll_courses(student, course_ids):
+    """Request approval for ``course_ids`` on behalf of ``student``."""
+    return bulk_enroll((student.pk, course_id) for course_id in course_ids)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from metrics import registry
+from .models import StudentCourse
+
+
+def _enrollment_map_key(student_id):
+    return f"student:enrollment_map:{student_id}"
+
+
+def get_enrollment_map(student_id):
+    """Return ``{course_id: status}`` for every course the student requested.
+
+    Built with one ``values_list`` query and cached per student until one
+    of their enrollments changes.
+    """
+    key = _enrollment_map_key(student_id)
+    enrollment_map = cache.get(key)
+    registry.inc(
+        "cache_requests_total", cache="enrollment_map",
+        result="miss" if enrollment_map is None else "hit",
+    )
+    if enrollment_map is None:
+        enrollment_map = dict(
+            StudentCourse.objects.filter(student_id=student_id)
+            .order_by()
+            .values_list("course_id", "status")
+        )
+        cache.set(key, enrollment_map, settings.DATA_CACHE_TIMEOUT)
+    return enrollment_map
+
+
+def invalidate_enrollment_maps(student_ids):
+    cache.delete_many([_enrollment_map_key(student_id) for student_id in student_ids])
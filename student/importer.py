@@ -0,0 +1,245 @@
+import csv
+import multiprocessing
+import time
+from datetime import date
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from metrics import registry
+from principal.models import Department
+from principal.stats import invalidate_dashboard_stats
+from .models import Student
+
+CHUNK_SIZE = getattr(settings, "STUDENT_IMPORT_CHUNK_SIZE", 1000)
+REQUIRED_COLUMNS = {"first_name", "last_name", "email", "std_reg_no"}
+# Errors kept in memory for display; the full report is streamed to a file
+MAX_KEPT_ERRORS = 100
+
+
+def _hash_passwords(passwords):
+    # None (no password column/value) becomes an unusable password
+    return [make_password(password) for password in passwords]
+
+
+def _hash_chunk(passwords, pool, workers):
+    if pool is None:
+        return _hash_passwords(passwords)
+    # Split the chunk so every worker gets a share of the hashing
+    size = max(1, -(-len(passwords) // workers))
+    parts = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+    return [hashed for part in pool.map(_hash_passwords, parts) for hashed in part]
+
+
+def _int_or_none(value, field, errors, low=None, high=None):
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        errors.append(f"{field}: '{value}' is not a number")
+        return None
+    if (low is not None and number < low) or (high is not None and number > high):
+        errors.append(f"{field}: must be between {low} and {high}")
+        return None
+    return number
+
+
+def _parse_row(row, departments):
+    """Return ``(fields, password, errors)`` for one CSV row, without touching the database."""
+    errors = []
+    value = {key: (row.get(key) or "").strip() for key in row if key}
+
+    for field in sorted(REQUIRED_COLUMNS):
+        if not value.get(field):
+            errors.append(f"{field}: required")
+
+    email = Student.objects.normalize_email(value.get("email", ""))
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append(f"email: '{email}' is not a valid address")
+
+    for field, max_length in (("first_name", 30), ("last_name", 150), ("std_reg_no", 12)):
+        if len(value.get(field, "")) > max_length:
+            errors.append(f"{field}: at most {max_length} characters")
+
+    phone = "".join(filter(str.isdigit, value.get("std_phone_no", "")))
+    if phone and len(phone) != 10:
+        errors.append("std_phone_no: must be exactly 10 digits")
+
+    dept = None
+    dept_name = value.get("std_dept", "")
+    if dept_name:
+        dept = departments.get(dept_name.lower())
+        if dept is None:
+            errors.append(f"std_dept: unknown department '{dept_name}'")
+
+    current_year = date.today().year
+    fields = {
+        "first_name": value.get("first_name", ""),
+        "last_name": value.get("last_name", ""),
+        "email": email,
+        "username": email,
+        "std_reg_no": value.get("std_reg_no", ""),
+        "std_dept_id": dept,
+        "std_phone_no": phone or None,
+        "std_age": _int_or_none(value.get("std_age"), "std_age", errors, 16, 50),
+        "std_year_of_admission": _int_or_none(
+            value.get("std_year_of_admission"), "std_year_of_admission", errors,
+            2000, current_year + 1,
+        ) or current_year,
+        "role": "STUDENT",
+    }
+    return fields, value.get("password") or None, errors
+
+
+def _registered_errors(fields, emails, reg_nos):
+    errors = []
+    if fields["email"].lower() in emails:
+        errors.append(f"email: '{fields['email']}' is already registered")
+    if fields["std_reg_no"] in reg_nos:
+        errors.append(f"std_reg_no: '{fields['std_reg_no']}' is already registered")
+    return errors
+
+
+def _taken(emails, reg_nos):
+    # One query per chunk instead of one per row and field
+    existing = Student.objects.filter(
+        Q(email__in=emails) | Q(username__in=emails) | Q(std_reg_no__in=reg_nos)
+    ).values_list("email", "username", "std_reg_no")
+    taken_emails, taken_reg_nos = set(), set()
+    for email, username, reg_no in existing:
+        taken_emails.update((email.lower(), username.lower()))
+        taken_reg_nos.add(reg_no)
+    return taken_emails, taken_reg_nos
+
+
+def import_students(csv_file, chunk_size=CHUNK_SIZE, workers=0, report=None):
+    """Create Student accounts from a CSV text stream.
+
+    Rows are read and validated ``chunk_size`` at a time, so memory stays
+    flat however large the file is. Uniqueness of ``email`` and
+    ``std_reg_no`` is checked with one query per chunk plus the keys
+    already seen in the file, passwords are hashed across ``workers``
+    processes (started once a chunk has a password for each; 0 hashes
+    in-process) and valid rows are inserted with ``bulk_create``. Rows
+    whose keys another request registers in the meantime are rejected
+    too. Rejected rows are written to ``report`` (a file-like object) as
+    ``line,errors`` CSV.
+
+    Returns a dict with ``rows``, ``created``, ``failed``, ``seconds``,
+    ``rows_per_second`` and the first ``errors`` as ``(line, message)``.
+    """
+    started = time.monotonic()
+    reader = csv.DictReader(csv_file)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+    departments = {
+        name.lower(): pk for pk, name in Department.objects.values_list("id", "dept_name")
+    }
+    report_writer = csv.writer(report) if report is not None else None
+    if report_writer:
+        report_writer.writerow(["line", "errors"])
+
+    result = {"rows": 0, "created": 0, "failed": 0, "errors": []}
+    used_emails, used_reg_nos = set(), set()
+
+    def reject(line_no, messages):
+        message = "; ".join(messages)
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_KEPT_ERRORS:
+            result["errors"].append((line_no, message))
+        if report_writer:
+            report_writer.writerow([line_no, message])
+
+    pool = None
+    try:
+        while True:
+            parsed = []
+            for row in islice(reader, chunk_size):
+                # line_num counts physical lines, so quoted newlines stay accurate
+                parsed.append((reader.line_num, *_parse_row(row, departments)))
+            if not parsed:
+                break
+            result["rows"] += len(parsed)
+
+            taken_emails, taken_reg_nos = _taken(
+                {fields["email"] for _, fields, _, _ in parsed if fields["email"]},
+                {fields["std_reg_no"] for _, fields, _, _ in parsed if fields["std_reg_no"]},
+            )
+
+            valid = []
+            # Keys registered already or taken by earlier rows of the file
+            used_emails |= taken_emails
+            used_reg_nos |= taken_reg_nos
+            for line_no, fields, password, errors in parsed:
+                errors += _registered_errors(fields, used_emails, used_reg_nos)
+                if errors:
+                    reject(line_no, errors)
+                    continue
+                used_emails.add(fields["email"].lower())
+                used_reg_nos.add(fields["std_reg_no"])
+                valid.append((line_no, fields, password))
+
+            if not valid:
+                continue
+            passwords = [password for _, _, password in valid]
+            # Start the processes only once there is a password for each of
+            # them; small uploads hash faster than a pool starts
+            if pool is None and workers > 1 and sum(p is not None for p in passwords) >= workers:
+                # Imported here: multiprocessing is only needed for parallel hashing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Forked workers inherit the configured Django the hashers
+                # need; spawned ones would import this module before setup
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+            hashed = _hash_chunk(passwords, pool, workers)
+            rows = [
+                (line_no, fields, Student(password=password_hash, **fields))
+                for (line_no, fields, _), password_hash in zip(valid, hashed)
+            ]
+            while rows:
+                try:
+                    with transaction.atomic():
+                        Student.objects.bulk_create([student for _, _, student in rows], batch_size=chunk_size)
+                    break
+                except IntegrityError:
+                    # Another request registered some of these keys after
+                    # the check above; reject those rows and insert the rest
+                    taken_emails, taken_reg_nos = _taken(
+                        {fields["email"] for _, fields, _ in rows},
+                        {fields["std_reg_no"] for _, fields, _ in rows},
+                    )
+                    kept = []
+                    for line_no, fields, student in rows:
+                        errors = _registered_errors(fields, taken_emails, taken_reg_nos)
+                        if errors:
+                            reject(line_no, errors)
+                        else:
+                            kept.append((line_no, fields, student))
+                    if len(kept) == len(rows):
+                        raise
+                    rows = kept
+            result["created"] += len(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if result["created"]:
+        # bulk_create skips post_save, so refresh the dashboard counters here
+        invalidate_dashboard_stats()
+        registry.event("registrations", result["created"])
+
+    result["seconds"] = time.monotonic() - started
+    result["rows_per_second"] = result["rows"] / result["seconds"] if result["seconds"] else 0
+    return result
+
@@ -0,0 +1,145 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from metrics import registry
+from .counters import EMAIL_QUEUE_DEPTH, adjust_counters
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "MAIL_QUEUE_BATCH_SIZE", 50)
+MAX_ATTEMPTS = getattr(settings, "MAIL_QUEUE_MAX_ATTEMPTS", 5)
+RETRY_DELAY = getattr(settings, "MAIL_QUEUE_RETRY_DELAY", 60)  # seconds, doubled per attempt
+CLAIM_TIMEOUT = getattr(settings, "MAIL_QUEUE_CLAIM_TIMEOUT", 300)  # seconds
+
+
+def _recipients(recipient_list):
+    return ",".join(address.strip() for address in recipient_list if address)
+
+
+def queue_email(subject, body, recipient_list, from_email=None):
+    """Store an email for the worker to send; returns immediately."""
+    with transaction.atomic():
+        email = OutboundEmail.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL or "",
+            recipients=_recipients(recipient_list),
+        )
+        adjust_counters({EMAIL_QUEUE_DEPTH: 1})
+    return email
+
+
+def queue_emails(messages):
+    """Queue many ``(subject, body, recipient_list)`` tuples in one INSERT."""
+    from_email = settings.DEFAULT_FROM_EMAIL or ""
+    with transaction.atomic():
+        emails = OutboundEmail.objects.bulk_create(
+            [
+                OutboundEmail(
+                    subject=subject,
+                    body=body,
+                    from_email=from_email,
+                    recipients=_recipients(recipient_list),
+                )
+                for subject, body, recipient_list in messages
+            ],
+            batch_size=500,
+        )
+        adjust_counters({EMAIL_QUEUE_DEPTH: len(emails)})
+    return emails
+
+
+def _claim_batch(batch_size, max_attempts):
+    """Mark up to ``batch_size`` due emails SENDING and commit the claim.
+
+    Returns the claimed emails and the number of abandoned ones given up on.
+    """
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(status__in=OutboundEmail.QUEUED_STATUSES, send_after__lte=now)
+    with transaction.atomic():
+        # A SENDING email is due again once its claim expires, which means
+        # its worker died; one that was on its last attempt is given up
+        abandoned = due.filter(status="SENDING", attempts__gte=max_attempts).update(
+            status="FAILED", last_error="Worker stopped while sending"
+        )
+        # skip_locked lets several workers drain the queue without
+        # double-sending; backends without row locks ignore it.
+        batch = list(due.select_for_update(skip_locked=True)[:batch_size])
+        for email in batch:
+            email.status = "SENDING"
+            email.attempts += 1
+            email.send_after = now + timedelta(seconds=CLAIM_TIMEOUT)
+        OutboundEmail.objects.bulk_update(batch, ["status", "attempts", "send_after"])
+        adjust_counters({EMAIL_QUEUE_DEPTH: -abandoned})
+    return batch, abandoned
+
+
+def _record(email):
+    with transaction.atomic():
+        email.save(update_fields=["status", "send_after", "sent_at", "last_error"])
+        # Sent and failed emails leave the queue; retries stay in it
+        if email.status not in OutboundEmail.QUEUED_STATUSES:
+            adjust_counters({EMAIL_QUEUE_DEPTH: -1})
+
+
+def send_queued_mail(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY):
+    """Send every due email over a single SMTP connection.
+
+    Emails are claimed a batch at a time and the claim is committed before
+    anything is sent, so no row lock or transaction is held across SMTP
+    calls; each email's result is saved as soon as it is known. Failed
+    sends are retried with exponential backoff and marked FAILED after
+    ``max_attempts``. Returns ``(sent, failed)`` counts.
+    """
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        while True:
+            batch, abandoned = _claim_batch(batch_size, max_attempts)
+            failed += abandoned
+            registry.inc("emails_total", abandoned, result="failed")
+            if not batch:
+                break
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email or None,
+                    to=email.recipients.split(","),
+                    connection=connection,
+                )
+                try:
+                    # Opens on first use and is reused until it breaks;
+                    # an empty queue never touches the mail server
+                    connection.open()
+                    message.send()
+                except Exception as e:
+                    logger.warning("Sending queued email %s failed: %s", email.pk, e)
+                    email.last_error = str(e)
+                    if email.attempts >= max_attempts:
+                        email.status = "FAILED"
+                        failed += 1
+                        registry.inc("emails_total", result="failed")
+                    else:
+                        email.status = "PENDING"
+                        email.send_after = timezone.now() + timedelta(
+                            seconds=retry_delay * 2 ** (email.attempts - 1)
+                        )
+                    # Start the next message on a fresh connection
+                    connection.close()
+                else:
+                    email.status = "SENT"
+                    email.sent_at = timezone.now()
+                    email.last_error = ""
+                    sent += 1
+                    registry.inc("emails_total", result="sent")
+                _record(email)
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from student.media import stage_existing_pictures
+
+
+class Command(BaseCommand):
+    help = "Queue existing profile pictures so the media worker renders their thumbnails"
+
+    def handle(self, *args, **options):
+        staged = stage_existing_pictures()
+        self.stdout.write(
+            f"Staged {staged} picture(s); run process_media_uploads to render them."
+        )
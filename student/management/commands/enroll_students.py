@@ -0,0 +1,61 @@
+import csv
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from principal.models import AddOnCourse
+from student.enrollment import bulk_enroll
+from student.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Request course enrollments in bulk from a CSV file with "
+        "'std_reg_no' and 'course_id' columns"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        created = skipped = 0
+        try:
+            handle = open(options["csv_file"], newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with handle:
+            reader = csv.DictReader(handle)
+            missing = {"std_reg_no", "course_id"} - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+            while True:
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    break
+
+                # Resolve registration numbers and course codes once per batch
+                reg_nos = {row["std_reg_no"].strip() for row in rows}
+                codes = {row["course_id"].strip().upper() for row in rows}
+                student_ids = dict(
+                    Student.objects.filter(std_reg_no__in=reg_nos).values_list("std_reg_no", "id")
+                )
+                course_ids = dict(
+                    AddOnCourse.objects.filter(course_id__in=codes).values_list("course_id", "id")
+                )
+
+                pairs = []
+                for row in rows:
+                    student_id = student_ids.get(row["std_reg_no"].strip())
+                    course_id = course_ids.get(row["course_id"].strip().upper())
+                    if student_id and course_id:
+                        pairs.append((student_id, course_id))
+                created += bulk_enroll(pairs, batch_size=batch_size)
+                skipped += len(rows) - len(pairs)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} enrollment(s); {skipped} row(s) did not match a student or course."
+        ))
@@ -0,0 +1,52 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student.importer import CHUNK_SIZE, import_students
+
+
+class Command(BaseCommand):
+    help = (
+        "Create student accounts from a CSV file with first_name, last_name, "
+        "email and std_reg_no columns (optional: password, std_dept, "
+        "std_year_of_admission, std_phone_no, std_age)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Processes used for password hashing (0 hashes in-process)",
+        )
+        parser.add_argument("--report", help="Write rejected rows to this CSV file")
+
+    def handle(self, *args, **options):
+        try:
+            handle = open(options["csv_file"], newline="", encoding="utf-8-sig")
+            report = open(options["report"], "w", newline="", encoding="utf-8") if options["report"] else None
+        except OSError as e:
+            raise CommandError(str(e))
+
+        try:
+            with handle:
+                result = import_students(
+                    handle,
+                    chunk_size=options["chunk_size"],
+                    workers=options["workers"],
+                    report=report,
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if report:
+                report.close()
+
+        if not options["report"]:
+            for line, message in result["errors"]:
+                self.stderr.write(f"Line {line}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} of {result['rows']} student(s); "
+            f"{result['failed']} rejected. "
+            f"{result['seconds']:.1f}s, {result['rows_per_second']:.0f} rows/s."
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from student.media import BATCH_SIZE, MAX_ATTEMPTS, process_pending_uploads
+
+
+class Command(BaseCommand):
+    help = "Resize staged profile pictures and publish them to the media storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for uploads instead of exiting"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2.0, help="Seconds to sleep between polls"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed, failed = process_pending_uploads(
+                batch_size=options["batch_size"], max_attempts=options["max_attempts"]
+            )
+            if processed or failed or not options["loop"]:
+                self.stdout.write(f"Processed {processed} upload(s); {failed} failed.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from student.summary import rebuild_all_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-student enrollment counters and approved spend"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_all_summaries(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} enrollment summaries."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from student.counters import recount
+
+
+class Command(BaseCommand):
+    help = "Reset the pending-enrollment and email-queue counters from a full count"
+
+    def handle(self, *args, **options):
+        totals = recount()
+        for name, value in totals.items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(self.style.SUCCESS("Workflow counters recounted."))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from student.mail import BATCH_SIZE, MAX_ATTEMPTS, send_queued_mail
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbound emails over one pooled mail connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling the queue instead of exiting"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="Seconds to sleep between polls"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_mail(
+                batch_size=options["batch_size"], max_attempts=options["max_attempts"]
+            )
+            if sent or failed or not options["loop"]:
+                self.stdout.write(f"Sent {sent} email(s); {failed} gave up after retries.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
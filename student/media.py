@@ -0,0 +1,216 @@
+import logging
+import os
+import uuid
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProfilePictureUpload, Student
+from .storage import profile_picture_storage, staging_storage
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, "MEDIA_UPLOAD_BATCH_SIZE", 20)
+MAX_ATTEMPTS = getattr(settings, "MEDIA_UPLOAD_MAX_ATTEMPTS", 3)
+CLAIM_TIMEOUT = getattr(settings, "MEDIA_UPLOAD_CLAIM_TIMEOUT", 600)  # seconds
+
+# Square renditions produced for every picture; "large" becomes std_pic
+RENDITION_SIZES = {"large": 512, "medium": 160, "small": 64}
+JPEG_QUALITY = 85
+
+
+def stage_profile_picture(student, uploaded_file):
+    """Copy an upload to local staging and queue it; returns immediately.
+
+    With MEDIA_PROCESS_INLINE the picture is rendered and published right
+    away instead, and the returned job is already DONE or FAILED.
+    """
+    if settings.MEDIA_PROCESS_INLINE:
+        return _process_inline(student, uploaded_file)
+    ext = os.path.splitext(uploaded_file.name)[1].lower()
+    name = staging_storage().save(f"{student.pk}/{uuid.uuid4().hex}{ext}", uploaded_file)
+    return ProfilePictureUpload.objects.create(student=student, staged_name=name)
+
+
+def _process_inline(student, uploaded_file):
+    upload = ProfilePictureUpload(student=student, staged_name="", attempts=1)
+    try:
+        _publish(upload, profile_picture_storage(), uploaded_file)
+    except Exception as e:
+        logger.warning("Processing picture for student %s failed: %s", student.pk, e)
+        upload.status = "FAILED"
+        upload.last_error = str(e)
+        upload.save()
+    return upload
+
+
+def stage_existing_pictures():
+    """Queue pictures that predate the thumbnail renditions; returns the count."""
+    storage = profile_picture_storage()
+    students = (
+        Student.objects.exclude(std_pic="").exclude(std_pic__isnull=True)
+        .filter(std_pic_small_url="")
+        .exclude(picture_uploads__status="PENDING")
+    )
+    staged = 0
+    for student in students.iterator():
+        try:
+            with storage.open(student.std_pic.name, "rb") as original:
+                stage_profile_picture(student, original)
+        except Exception as e:
+            logger.warning("Could not stage picture for student %s: %s", student.pk, e)
+        else:
+            staged += 1
+    return staged
+
+
+def render_picture(source):
+    """Return ``{size_name: jpeg_bytes}`` for an image file object."""
+    # Only the media worker resizes, so web processes never load Pillow
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        # Flatten transparency onto white; JPEG has no alpha channel
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+
+        renditions = {}
+        for size_name, size in RENDITION_SIZES.items():
+            thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            thumb.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            renditions[size_name] = buffer.getvalue()
+    return renditions
+
+
+def _delete_assets(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            # A leftover asset is harmless; never fail the job over it
+            logger.warning("Could not delete old picture %s: %s", name, e)
+
+
+def _process(upload, storage):
+    staging = staging_storage()
+    with staging.open(upload.staged_name, "rb") as source:
+        _publish(upload, storage, source)
+    staging.delete(upload.staged_name)
+
+
+def _publish(upload, storage, source):
+    """Render ``source``, upload the renditions and switch the student to them.
+
+    Decoding, resizing and uploads run outside any transaction; only the
+    switch to the new renditions and the job's DONE row are written in one.
+    """
+    rendered = render_picture(source)
+
+    token = uuid.uuid4().hex[:12]
+    renditions = {}
+    try:
+        for size_name, data in rendered.items():
+            renditions[size_name] = storage.save(
+                f"student_pic/{upload.student_id}/{token}_{size_name}.jpg", ContentFile(data)
+            )
+
+        student = upload.student
+        with transaction.atomic():
+            old_assets = {student.std_pic.name} if student.std_pic else set()
+            previous = ProfilePictureUpload.objects.filter(
+                student_id=upload.student_id, status="DONE"
+            ).exclude(pk=upload.pk)
+            for job in previous:
+                old_assets.update(job.renditions.values())
+            old_assets -= set(renditions.values())
+
+            # Resolve the thumbnail URLs once here instead of on every page render
+            student.std_pic.name = renditions["large"]
+            student.std_pic_small_url = storage.url(renditions["small"])
+            student.std_pic_medium_url = storage.url(renditions["medium"])
+            student.save(update_fields=["std_pic", "std_pic_small_url", "std_pic_medium_url"])
+            previous.update(renditions={})
+
+            upload.renditions = renditions
+            upload.status = "DONE"
+            upload.processed_at = timezone.now()
+            upload.last_error = ""
+            upload.save()
+    except Exception:
+        # Nothing points at the new renditions yet
+        _delete_assets(storage, renditions.values())
+        raise
+    _delete_assets(storage, old_assets)
+
+
+def _claim_batch(batch_size, max_attempts, attempted):
+    stale = timezone.now() - timedelta(seconds=CLAIM_TIMEOUT)
+    abandoned = Q(status="PROCESSING", claimed_at__lt=stale)
+    with transaction.atomic():
+        # A job whose worker died on its last attempt is not tried again
+        ProfilePictureUpload.objects.filter(abandoned, attempts__gte=max_attempts).update(
+            status="FAILED", last_error="Worker stopped while processing"
+        )
+        # skip_locked lets several workers share the queue
+        batch = list(
+            ProfilePictureUpload.objects.filter(Q(status="PENDING") | abandoned, attempts__lt=max_attempts)
+            .exclude(pk__in=attempted)
+            .select_related("student")
+            .select_for_update(skip_locked=True, of=("self",))[:batch_size]
+        )
+        # Counting the attempt when the job is claimed means a job that
+        # crashes its worker still runs out of attempts
+        now = timezone.now()
+        for upload in batch:
+            upload.status = "PROCESSING"
+            upload.claimed_at = now
+            upload.attempts += 1
+        ProfilePictureUpload.objects.bulk_update(batch, ["status", "claimed_at", "attempts"])
+    return batch
+
+
+def process_pending_uploads(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Render, publish and clean up staged profile pictures.
+
+    Jobs are claimed a batch at a time in a short transaction, then each
+    is processed on its own without holding row locks. Each job writes the
+    fixed-size JPEG renditions to the profile picture storage, points
+    ``std_pic`` at the large one and deletes the assets it replaces.
+    Returns ``(processed, failed)`` counts.
+    """
+    processed = failed = 0
+    storage = profile_picture_storage()
+    attempted = set()
+    while True:
+        batch = _claim_batch(batch_size, max_attempts, attempted)
+        if not batch:
+            break
+        for upload in batch:
+            # Failed jobs wait for the next run rather than retrying at once
+            attempted.add(upload.pk)
+            try:
+                _process(upload, storage)
+            except Exception as e:
+                logger.warning("Processing picture upload %s failed: %s", upload.pk, e)
+                upload.last_error = str(e)
+                if upload.attempts >= max_attempts:
+                    upload.status = "FAILED"
+                    failed += 1
+                else:
+                    upload.status = "PENDING"
+                upload.save(update_fields=["status", "last_error"])
+            else:
+                processed += 1
+    return processed, failed
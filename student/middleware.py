@@ -1,11 +1,187 @@
-from datetime import datetime
+import cProfile
+import json
+import logging
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger("instrumentation")
+
+# Template render time for the current request; None when not instrumenting
+_template_timer = ContextVar("template_timer", default=None)
+_original_template_render = Template.render
+# Instrumented requests in flight; Template.render is only patched while
+# there are any
+_timed_requests = 0
+_timed_requests_lock = threading.Lock()
+# cProfile allows one active profiler per process on Python 3.12+
+_profile_lock = threading.Lock()
+
+
+def _timed_template_render(self, context):
+    timer = _template_timer.get()
+    if timer is None or timer["depth"]:
+        # Included templates are already inside the outer render's time
+        return _original_template_render(self, context)
+    timer["depth"] += 1
+    started = time.perf_counter()
+    try:
+        return _original_template_render(self, context)
+    finally:
+        timer["seconds"] += time.perf_counter() - started
+        timer["depth"] -= 1
+
+
+@contextmanager
+def _timing_templates():
+    global _timed_requests
+    with _timed_requests_lock:
+        if not _timed_requests:
+            Template.render = _timed_template_render
+        _timed_requests += 1
+    try:
+        yield
+    finally:
+        with _timed_requests_lock:
+            _timed_requests -= 1
+            if not _timed_requests:
+                Template.render = _original_template_render
+
+
+class QueryRecorder:
+    """execute_wrapper that counts, times and fingerprints SQL statements"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        # Identical SQL with identical parameters run more than once
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    @property
+    def similar(self):
+        # Repeats of the same SQL whatever the parameters: the N+1 signature
+        shapes = {sql for sql, _ in self.statements}
+        return self.count - len(shapes)
+
+
+class InstrumentationMiddleware:
+    """Per-request timing, SQL and memory metrics, enabled by INSTRUMENTATION_ENABLED.
+
+    Each response gets a Server-Timing header and one JSON line is logged to
+    the "instrumentation" logger. Requests picked by
+    INSTRUMENTATION_PROFILE_RATE or matching INSTRUMENTATION_PROFILE_PATHS
+    are run under cProfile and dumped to INSTRUMENTATION_PROFILE_DIR.
+    """
 
-class DateMiddleware:
-    
     def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
         self.get_response = get_response
-    
+        self.trace_memory = getattr(settings, "INSTRUMENTATION_TRACE_MEMORY", False)
+        self.profile_rate = getattr(settings, "INSTRUMENTATION_PROFILE_RATE", 0.0)
+        pattern = getattr(settings, "INSTRUMENTATION_PROFILE_PATHS", "")
+        self.profile_paths = re.compile(pattern) if pattern else None
+        self.profile_dir = Path(getattr(settings, "INSTRUMENTATION_PROFILE_DIR", "profiles"))
+
+    def should_profile(self, request):
+        if self.profile_paths and self.profile_paths.search(request.path):
+            return True
+        return self.profile_rate > 0 and random.random() < self.profile_rate
+
+    def start_profiler(self, request):
+        # A request picked while another is being profiled goes unprofiled
+        if not self.should_profile(request) or not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Some other profiling tool is active in this process
+            _profile_lock.release()
+            return None
+        return profiler
+
     def __call__(self, request):
-        request.current_date = datetime.now().strftime('%d/%m/%Y')
-        response = self.get_response(request)
-        return response
\ No newline at end of file
+        recorder = QueryRecorder()
+        timer = {"seconds": 0.0, "depth": 0}
+        token = _template_timer.set(timer)
+        profiler = None
+        # tracemalloc is process-wide, so leave it alone if someone else started it
+        trace_memory = self.trace_memory and not tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                stack.enter_context(_timing_templates())
+                profiler = self.start_profiler(request)
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler:
+                        profiler.disable()
+                        _profile_lock.release()
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+            if trace_memory:
+                tracemalloc.stop()
+            _template_timer.reset(token)
+
+        metrics = {
+            "method": request.method,
+            "path": request.path,
+            "view": getattr(request.resolver_match, "view_name", None),
+            "status": response.status_code,
+            "total_ms": round(elapsed * 1000, 2),
+            "db_ms": round(recorder.seconds * 1000, 2),
+            "queries": recorder.count,
+            "duplicate_queries": recorder.duplicates,
+            "similar_queries": recorder.similar,
+            "template_ms": round(timer["seconds"] * 1000, 2),
+        }
+        if peak is not None:
+            metrics["peak_memory_kib"] = round(peak / 1024, 1)
+        if profiler:
+            metrics["profile"] = self.dump_profile(profiler, request)
+
+        response["Server-Timing"] = ", ".join([
+            f"total;dur={metrics['total_ms']}",
+            f'db;dur={metrics["db_ms"]};desc="{recorder.count} queries"',
+            f"tpl;dur={metrics['template_ms']}",
+        ])
+        logger.info(json.dumps(metrics))
+        return response
+
+    def dump_profile(self, profiler, request):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+        path = self.profile_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{random.getrandbits(24):06x}.prof"
+        profiler.dump_stats(path)
+        return str(path)
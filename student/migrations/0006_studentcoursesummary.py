@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    Student = apps.get_model('student', 'Student')
+    StudentCourse = apps.get_model('student', 'StudentCourse')
+    StudentCourseSummary = apps.get_model('student', 'StudentCourseSummary')
+
+    totals = {
+        row['student_id']: row
+        for row in StudentCourse.objects.values('student_id').annotate(
+            approved_count=Count('id', filter=Q(status='APPROVED')),
+            pending_count=Count('id', filter=Q(status='PENDING')),
+            rejected_count=Count('id', filter=Q(status='REJECTED')),
+            approved_spend=Sum('course__course_price', filter=Q(status='APPROVED')),
+        )
+    }
+    summaries = []
+    for student_id in Student.objects.values_list('id', flat=True):
+        row = totals.get(student_id, {})
+        summaries.append(StudentCourseSummary(
+            student_id=student_id,
+            approved_count=row.get('approved_count', 0),
+            pending_count=row.get('pending_count', 0),
+            rejected_count=row.get('rejected_count', 0),
+            approved_spend=row.get('approved_spend') or 0,
+        ))
+    StudentCourseSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('principal', '0004_remove_addoncourse_created_by_and_more'),
+        ('student', '0005_studentcourse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentCourseSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='course_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('approved_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('rejected_count', models.PositiveIntegerField(default=0)),
+                ('approved_spend', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
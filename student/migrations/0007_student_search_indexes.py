@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations
+
+SEARCH_COLUMNS = ['first_name', 'last_name', 'email', 'std_reg_no']
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    for column in SEARCH_COLUMNS:
+        name = quote(f'student_search_{column}_idx')
+        if vendor == 'postgresql':
+            # Trigram index matching the UPPER(...) LIKE that icontains emits
+            if column == SEARCH_COLUMNS[0]:
+                schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON student_student '
+                f'USING gin (UPPER({quote(column)}::text) gin_trgm_ops)'
+            )
+        elif vendor == 'sqlite':
+            # LIKE 'abc%' can only use an index built with NOCASE collation
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON student_student '
+                f'({quote(column)} COLLATE NOCASE)'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    for column in SEARCH_COLUMNS:
+        name = schema_editor.quote_name(f'student_search_{column}_idx')
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0006_studentcoursesummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
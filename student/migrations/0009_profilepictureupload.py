@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1
+
+import django.db.models.deletion
+import student.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0008_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='std_pic',
+            field=models.ImageField(blank=True, null=True, storage=student.storage.profile_picture_storage, upload_to='student_pic'),
+        ),
+        migrations.CreateModel(
+            name='ProfilePictureUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staged_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('renditions', models.JSONField(blank=True, default=dict)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='picture_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'id'], name='picture_upload_status_idx')],
+            },
+        ),
+    ]
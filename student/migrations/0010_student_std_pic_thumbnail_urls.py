@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0009_profilepictureupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='std_pic_small_url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='std_pic_medium_url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+    ]
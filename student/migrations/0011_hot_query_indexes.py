@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0010_student_std_pic_thumbnail_urls'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['role', '-date_joined', '-id'], name='student_role_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcourse',
+            index=models.Index(fields=['student', 'status'], name='enroll_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcourse',
+            index=models.Index(fields=['status', '-purchased_at'], name='enroll_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentcourse',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['-purchased_at'], name='enroll_pending_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    WorkflowCounter = apps.get_model('student', 'WorkflowCounter')
+    StudentCourse = apps.get_model('student', 'StudentCourse')
+    OutboundEmail = apps.get_model('student', 'OutboundEmail')
+    WorkflowCounter.objects.bulk_create([
+        WorkflowCounter(
+            name='pending_enrollments',
+            value=StudentCourse.objects.filter(status='PENDING').count(),
+        ),
+        WorkflowCounter(
+            name='email_queue_depth',
+            value=OutboundEmail.objects.filter(status='PENDING').count(),
+        ),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
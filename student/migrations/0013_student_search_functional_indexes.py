@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+SEARCH_COLUMNS = ['first_name', 'last_name', 'email', 'std_reg_no']
+
+
+def drop_nocase_indexes(apps, schema_editor):
+    # 0007 created these with raw SQL, so table rebuilds (0009) already
+    # dropped them on most databases; the functional indexes below replace
+    # them. PostgreSQL keeps its trigram indexes.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for column in SEARCH_COLUMNS:
+        name = schema_editor.quote_name(f'student_search_{column}_idx')
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0012_workflowcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_nocase_indexes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='student_lower_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='student_lower_last_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='student_lower_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower('std_reg_no'), name='student_lower_std_reg_no_idx'),
+        ),
+    ]
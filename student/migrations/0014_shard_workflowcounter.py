@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    WorkflowCounter = apps.get_model('student', 'WorkflowCounter')
+    StudentCourse = apps.get_model('student', 'StudentCourse')
+    OutboundEmail = apps.get_model('student', 'OutboundEmail')
+    totals = {
+        'pending_enrollments': StudentCourse.objects.filter(status='PENDING').count(),
+        'email_queue_depth': OutboundEmail.objects.filter(status='PENDING').count(),
+    }
+    # Same layout as student.counters.recount(): all 16 shards, the total on shard 0
+    WorkflowCounter.objects.bulk_create([
+        WorkflowCounter(name=name, shard=shard, value=value if shard == 0 else 0)
+        for name, value in totals.items()
+        for shard in range(16)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0013_student_search_functional_indexes'),
+    ]
+
+    # The name primary key gives way to (name, shard); the totals are
+    # recounted rather than copied
+    operations = [
+        migrations.DeleteModel(
+            name='WorkflowCounter',
+        ),
+        migrations.CreateModel(
+            name='WorkflowCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('name', 'shard')},
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+SEARCH_COLUMNS = ['first_name', 'last_name', 'email', 'std_reg_no']
+
+
+def lower_indexes():
+    return [
+        models.Index(django.db.models.functions.text.Lower(column), name=f'student_lower_{column}_idx')
+        for column in SEARCH_COLUMNS
+    ]
+
+
+def drop_on_postgresql(apps, schema_editor):
+    # PostgreSQL searches with icontains through the trigram indexes from
+    # 0007; these would only slow down every write to the table
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Student = apps.get_model('student', 'Student')
+    for index in lower_indexes():
+        schema_editor.remove_index(Student, index)
+
+
+def create_on_postgresql(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Student = apps.get_model('student', 'Student')
+    for index in lower_indexes():
+        schema_editor.add_index(Student, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0016_outboundemail_sending_status'),
+    ]
+
+    # The Lower() indexes leave the model state: other databases keep the
+    # ones 0013 created, PostgreSQL drops them
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name='student', name=f'student_lower_{column}_idx')
+                for column in SEARCH_COLUMNS
+            ],
+            database_operations=[
+                migrations.RunPython(drop_on_postgresql, create_on_postgresql),
+            ],
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 from principal.models import Department
+from .storage import profile_picture_storage
 from datetime import date
 
 class Student(AbstractUser):
@@ -18,7 +20,16 @@ class Student(AbstractUser):
     )
     std_age = models.IntegerField(null=True, blank=True)
     
-    std_pic = models.ImageField(upload_to="student_pic", null=True, blank=True)
+    std_pic = models.ImageField(
+        upload_to="student_pic",
+        storage=profile_picture_storage,
+        null=True,
+        blank=True
+    )
+    # Resolved URLs of the small/medium renditions, written by the media
+    # worker so list pages never ask the storage backend for a URL
+    std_pic_small_url = models.CharField(max_length=500, blank=True)
+    std_pic_medium_url = models.CharField(max_length=500, blank=True)
 
     std_reg_no = models.CharField(max_length=12, unique=True)
     std_dept = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True)
@@ -35,10 +46,36 @@ class Student(AbstractUser):
     first_name = models.CharField(max_length=30)
     last_name = models.CharField(max_length=150)
     email = models.EmailField(unique=True) 
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # students_list / dashboard: role filter, newest first
+            models.Index(fields=['role', '-date_joined', '-id'], name='student_role_joined_idx'),
+        ]
+        # The students_list search indexes are kept outside the model state
+        # since they differ per database: trigram indexes on PostgreSQL
+        # (0007), Lower() indexes elsewhere (0013, 0017). A migration that
+        # rebuilds this table on SQLite must recreate the Lower() ones.
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.std_reg_no} ({self.role})"
 
+    def get_session_auth_hash(self):
+        # Cached users (student.user_cache) carry the hash instead of the
+        # password; once the password is loaded or changed, hash that
+        if "password" in self.get_deferred_fields() and hasattr(self, "cached_session_auth_hash"):
+            return self.cached_session_auth_hash
+        return super().get_session_auth_hash()
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Signed-in users are snapshots with most columns deferred (see
+        # student.user_cache); touching one loads them all in one query
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred.intersection(fields):
+                fields = deferred.union(fields)
+        super().refresh_from_db(using, fields, **kwargs)
+
 
 class StudentCourse(models.Model):
     """Track student course purchases with approval status"""
@@ -57,6 +94,119 @@ class StudentCourse(models.Model):
     class Meta:
         unique_together = ('student', 'course')
         ordering = ['-purchased_at']
+        indexes = [
+            models.Index(fields=['student', 'status'], name='enroll_student_status_idx'),
+            models.Index(fields=['status', '-purchased_at'], name='enroll_status_recent_idx'),
+            # The approval queue only ever reads PENDING rows
+            models.Index(
+                fields=['-purchased_at'],
+                condition=models.Q(status='PENDING'),
+                name='enroll_pending_recent_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.std_reg_no} - {self.course.course_name} ({self.status})"
+
+
+class StudentCourseSummary(models.Model):
+    """Per-student enrollment counters, maintained alongside StudentCourse"""
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='course_summary'
+    )
+    approved_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    approved_spend = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total_count(self):
+        return self.approved_count + self.pending_count + self.rejected_count
+
+    def __str__(self):
+        return f"{self.student_id}: {self.approved_count} approved, {self.pending_count} pending"
+
+
+class OutboundEmail(models.Model):
+    """Email waiting to be delivered by the send_queued_mail worker"""
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+    # Statuses of emails still in the queue
+    QUEUED_STATUSES = ('PENDING', 'SENDING')
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.TextField(help_text="Comma-separated addresses")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # While SENDING, when the worker's claim expires
+    send_after = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients} ({self.status})"
+
+
+class ProfilePictureUpload(models.Model):
+    """A staged profile picture waiting for the media worker to process it"""
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('PROCESSING', 'Processing'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='picture_uploads')
+    staged_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    renditions = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When a worker took the job; a PROCESSING job whose worker died is
+    # picked up again once the claim is MEDIA_UPLOAD_CLAIM_TIMEOUT old
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id'], name='picture_upload_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id}: {self.staged_name} ({self.status})"
+
+
+class WorkflowCounter(models.Model):
+    """One shard of a running total kept in step with the rows it counts.
+
+    A counter's value is the sum of its shards; writers each add to a
+    random shard so concurrent transactions rarely wait on the same row.
+    """
+    name = models.CharField(max_length=50)
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('name', 'shard')
+
+    def __str__(self):
+        return f"{self.name}[{self.shard}] = {self.value}"
@@ -0,0 +1,93 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from metrics import registry
+from principal.models import AddOnCourse
+from .counters import EMAIL_QUEUE_DEPTH, PENDING_ENROLLMENTS, adjust_counters
+from .models import OutboundEmail, Student, StudentCourse, StudentCourseSummary
+from .enrollment_map import invalidate_enrollment_maps
+from .summary import rebuild_summaries
+from .user_cache import invalidate_user
+
+# Sent after bulk writes that bypass the model signals, with the ids of
+# the students whose enrollments changed.
+enrollments_changed = Signal()
+
+
+@receiver(post_save, sender=StudentCourse)
+def refresh_summary_on_save(sender, instance, **kwargs):
+    rebuild_summaries([instance.student_id])
+
+
+@receiver(post_save, sender=StudentCourse)
+@receiver(post_delete, sender=StudentCourse)
+def refresh_enrollment_map(sender, instance, **kwargs):
+    invalidate_enrollment_maps([instance.student_id])
+
+
+@receiver(post_delete, sender=StudentCourse)
+def refresh_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # Cascades are handled once by the origin's own handler below, and a
+    # deleted student takes their summary row with them.
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (Student, AddOnCourse):
+        return
+    rebuild_summaries([instance.student_id])
+
+
+@receiver(pre_delete, sender=AddOnCourse)
+def remember_course_students(sender, instance, **kwargs):
+    instance._summary_student_ids = list(
+        StudentCourse.objects.filter(course=instance).values_list("student_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=AddOnCourse)
+def refresh_summaries_for_course(sender, instance, **kwargs):
+    student_ids = getattr(instance, "_summary_student_ids", None)
+    if student_ids:
+        rebuild_summaries(student_ids)
+
+
+@receiver(enrollments_changed)
+def refresh_summaries_after_bulk_change(sender, student_ids, **kwargs):
+    rebuild_summaries(student_ids)
+    invalidate_enrollment_maps(student_ids)
+
+
+@receiver(pre_delete, sender=Student)
+def forget_pending_of_deleted_student(sender, instance, **kwargs):
+    # The summary row goes with the student, so take its pending requests
+    # off the counter here
+    pending = (
+        StudentCourseSummary.objects.filter(student=instance)
+        .values_list("pending_count", flat=True).first()
+    )
+    if pending:
+        adjust_counters({PENDING_ENROLLMENTS: -pending})
+
+
+@receiver(post_save, sender=Student)
+def count_registration(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.role == "STUDENT":
+        registry.event("registrations")
+
+
+@receiver(post_delete, sender=OutboundEmail)
+def dequeue_deleted_email(sender, instance, **kwargs):
+    if instance.status in OutboundEmail.QUEUED_STATUSES:
+        adjust_counters({EMAIL_QUEUE_DEPTH: -1})
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def forget_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_cached_user_on_logout(sender, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
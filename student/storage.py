@@ -0,0 +1,41 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage, storages
+from django.utils.functional import LazyObject, empty
+
+
+class _LazyStorage(LazyObject):
+    # Model fields call their storage callable when the model class is
+    # built; deferring the lookup keeps the backend (and the Cloudinary
+    # SDK it imports) out of startup until a picture URL is needed
+    def _setup(self):
+        self._wrapped = storages[getattr(settings, "PROFILE_PICTURE_STORAGE", "default")]
+
+    @property
+    def __class__(self):
+        # Lets FileField's isinstance(storage, Storage) check pass without
+        # building the backend
+        if self._wrapped is empty:
+            return Storage
+        return self._wrapped.__class__
+
+
+def profile_picture_storage():
+    """Storage backend for processed profile pictures.
+
+    Resolved through STORAGES by the PROFILE_PICTURE_STORAGE alias so tests
+    and local setups can swap Cloudinary for FileSystemStorage. The backend
+    is only instantiated on first use.
+    """
+    return _LazyStorage()
+
+
+@lru_cache(maxsize=None)
+def _staging_storage(location):
+    return FileSystemStorage(location=location)
+
+
+def staging_storage():
+    """Local disk area where raw uploads wait for the media worker"""
+    return _staging_storage(str(settings.MEDIA_STAGING_ROOT))
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .counters import PENDING_ENROLLMENTS, adjust_counters
+from .models import Student, StudentCourse, StudentCourseSummary
+
+SUMMARY_FIELDS = ["approved_count", "pending_count", "rejected_count", "approved_spend"]
+
+
+def _summary_totals(student_ids):
+    # One grouped aggregate for the whole batch of students
+    rows = (
+        StudentCourse.objects.filter(student_id__in=student_ids)
+        .order_by()
+        .values("student_id")
+        .annotate(
+            approved_count=Count("id", filter=Q(status="APPROVED")),
+            pending_count=Count("id", filter=Q(status="PENDING")),
+            rejected_count=Count("id", filter=Q(status="REJECTED")),
+            approved_spend=Sum("course__course_price", filter=Q(status="APPROVED")),
+        )
+    )
+    return {row["student_id"]: row for row in rows}
+
+
+def rebuild_summaries(student_ids, batch_size=1000):
+    """Recompute the enrollment summary rows for ``student_ids``.
+
+    Each batch costs four queries (a lock on the students, the old pending
+    counts, one aggregate, one upsert) no matter how many enrollments the
+    students have. The change in pending requests is applied to the
+    pending_enrollments counter. Returns the number of rows written.
+    """
+    # A fixed pk order keeps concurrent rebuilds from deadlocking
+    student_ids = sorted(set(student_ids))
+    written = 0
+    pending_delta = 0
+    with transaction.atomic():
+        for start in range(0, len(student_ids), batch_size):
+            batch = student_ids[start:start + batch_size]
+            # Concurrent rebuilds of the same students wait here, so none
+            # reads pending counts another is about to overwrite
+            list(
+                Student.objects.filter(pk__in=batch).order_by("pk")
+                .select_for_update().values_list("pk", flat=True)
+            )
+            pending_delta -= sum(
+                StudentCourseSummary.objects.filter(student_id__in=batch)
+                .values_list("pending_count", flat=True)
+            )
+            totals = _summary_totals(batch)
+            pending_delta += sum(row["pending_count"] for row in totals.values())
+            summaries = []
+            for student_id in batch:
+                row = totals.get(student_id, {})
+                summaries.append(StudentCourseSummary(
+                    student_id=student_id,
+                    approved_count=row.get("approved_count", 0),
+                    pending_count=row.get("pending_count", 0),
+                    rejected_count=row.get("rejected_count", 0),
+                    approved_spend=row.get("approved_spend") or 0,
+                ))
+            StudentCourseSummary.objects.bulk_create(
+                summaries,
+                update_conflicts=True,
+                unique_fields=["student"],
+                update_fields=SUMMARY_FIELDS + ["updated_at"],
+            )
+            written += len(summaries)
+        adjust_counters({PENDING_ENROLLMENTS: pending_delta})
+    return written
+
+
+def rebuild_all_summaries(batch_size=1000):
+    student_ids = Student.objects.filter(role="STUDENT").values_list("id", flat=True)
+    return rebuild_summaries(student_ids.iterator(chunk_size=batch_size), batch_size)
+
+
+def get_summary(student):
+    """Return the summary row for ``student``, building it if it is missing."""
+    try:
+        return StudentCourseSummary.objects.get(student_id=student.pk)
+    except StudentCourseSummary.DoesNotExist:
+        rebuild_summaries([student.pk])
+        return StudentCourseSummary.objects.get(student_id=student.pk)
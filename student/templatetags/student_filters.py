@@ -8,3 +8,14 @@ def get_item(dictionary, key):
     if dictionary is None:
         return None
     return dictionary.get(key)
+
+
+@register.simple_tag
+def with_enrollment_status(courses, enrollment_map):
+    """Pair each course with the student's request status (None if not requested)"""
+    enrollment_map = enrollment_map or {}
+    rows = []
+    for course in courses:
+        course_id = course["id"] if isinstance(course, dict) else course.id
+        rows.append((course, enrollment_map.get(course_id)))
+    return rows
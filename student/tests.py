@@ -1,3 +1,768 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage, Storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import empty
+from PIL import Image
+
+from metrics import MetricsMiddleware, registry
+from principal.approvals import decide_requests
+from principal.models import Department, AddOnCourse
+from . import async_views
+from .context_processors import current_date
+from .counters import EMAIL_QUEUE_DEPTH, PENDING_ENROLLMENTS, SHARDS, adjust_counters, get_counters, recount
+from .enrollment import enroll_courses
+from .enrollment_map import get_enrollment_map
+from .importer import _taken, import_students
+from .mail import queue_email, send_queued_mail
+from .media import process_pending_uploads, stage_existing_pictures
+from .models import (
+    OutboundEmail, ProfilePictureUpload, Student, StudentCourse, StudentCourseSummary, WorkflowCounter,
+)
+from .storage import profile_picture_storage, staging_storage
+from .summary import _summary_totals, get_summary, rebuild_summaries
+from .user_cache import get_cached_user
+
+
+def make_student(n, **extra):
+    return Student.objects.create_user(
+        username=f"student{n}@example.com",
+        email=f"student{n}@example.com",
+        password="pw",
+        std_reg_no=f"REG{n:04d}",
+        first_name=f"Student{n}",
+        last_name="Test",
+        **extra,
+    )
+
+
+class EnrollmentSummaryTests(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(dept_name="CS", dept_description="")
+        self.python = AddOnCourse.objects.create(
+            course_id="CS101", course_name="Python", department=self.dept, course_price=500
+        )
+        self.sql = AddOnCourse.objects.create(
+            course_id="CS102", course_name="SQL", department=self.dept, course_price=300
+        )
+        self.student = make_student(1)
+
+    def test_summary_follows_status_changes(self):
+        enrollment = StudentCourse.objects.create(student=self.student, course=self.python)
+        StudentCourse.objects.create(student=self.student, course=self.sql, status="REJECTED")
+        summary = get_summary(self.student)
+        self.assertEqual((summary.pending_count, summary.rejected_count), (1, 1))
+
+        enrollment.status = "APPROVED"
+        enrollment.save()
+        summary.refresh_from_db()
+        self.assertEqual(summary.approved_count, 1)
+        self.assertEqual(summary.pending_count, 0)
+        self.assertEqual(summary.approved_spend, 500)
+
+        enrollment.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.approved_count, summary.approved_spend), (0, 0))
+
+    def test_course_deletion_refreshes_summary(self):
+        StudentCourse.objects.create(student=self.student, course=self.python, status="APPROVED")
+        self.python.delete()
+        summary = get_summary(self.student)
+        self.assertEqual((summary.approved_count, summary.approved_spend), (0, 0))
+
+    def test_student_deletion_removes_summary(self):
+        StudentCourse.objects.create(student=self.student, course=self.python)
+        Student.objects.filter(pk=self.student.pk).delete()
+        self.assertFalse(StudentCourseSummary.objects.exists())
+
+    def test_rebuild_command(self):
+        StudentCourse.objects.create(student=self.student, course=self.python, status="APPROVED")
+        StudentCourseSummary.objects.all().delete()
+        call_command("rebuild_enrollment_summaries", stdout=StringIO())
+        self.assertEqual(get_summary(self.student).approved_spend, 500)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentSummaryTests(TransactionTestCase):
+    def test_interleaved_rebuilds_keep_the_counter_exact(self):
+        course = AddOnCourse.objects.create(course_id="CS101", course_name="Python", course_price=500)
+        student = make_student(1)
+        StudentCourse.objects.create(student=student, course=course)
+        recount()
+        reached, proceed = threading.Event(), threading.Event()
+
+        def paused_totals(student_ids):
+            # The first rebuild stops between reading and writing
+            if threading.current_thread().name == "first":
+                reached.set()
+                proceed.wait(5)
+            return _summary_totals(student_ids)
+
+        def approve_and_rebuild():
+            StudentCourse.objects.filter(student=student).update(status="APPROVED")
+            rebuild_summaries([student.pk])
+
+        def start(name, work):
+            def target():
+                try:
+                    work()
+                finally:
+                    connection.close()
+            thread = threading.Thread(target=target, name=name)
+            thread.start()
+            return thread
+
+        with mock.patch("student.summary._summary_totals", paused_totals):
+            first = start("first", lambda: rebuild_summaries([student.pk]))
+            self.assertTrue(reached.wait(5))
+            second = start("second", approve_and_rebuild)
+            time.sleep(0.2)
+            # The second rebuild waits for the first one's lock
+            self.assertTrue(second.is_alive())
+            proceed.set()
+            first.join(5)
+            second.join(5)
+
+        self.assertEqual(get_summary(student).pending_count, 0)
+        self.assertEqual(get_counters()[PENDING_ENROLLMENTS], 0)
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        self.courses = [
+            AddOnCourse.objects.create(course_id=f"C{i}", course_name=f"Course {i}", course_price=100)
+            for i in range(3)
+        ]
+        self.student = make_student(1)
+
+    def test_counts_only_new_enrollments(self):
+        StudentCourse.objects.create(student=self.student, course=self.courses[0])
+        ids = [str(course.id) for course in self.courses] + ["999", "junk"]
+
+        created = enroll_courses(self.student, ids)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(StudentCourse.objects.filter(student=self.student).count(), 3)
+        self.assertEqual(get_summary(self.student).pending_count, 3)
+
+    def test_repeat_request_creates_nothing(self):
+        enroll_courses(self.student, [self.courses[0].id])
+        self.assertEqual(enroll_courses(self.student, [self.courses[0].id]), 0)
+
+    def test_purchase_view_reports_created_count(self):
+        StudentCourse.objects.create(student=self.student, course=self.courses[0])
+        self.client.force_login(self.student)
+        response = self.client.post(
+            reverse("purchase_course"),
+            {"selected_courses": [course.id for course in self.courses]},
+            follow=True,
+        )
+        self.assertContains(response, "2 course(s) requested for approval!")
+
+
+class EnrollmentMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = AddOnCourse.objects.create(course_id="C1", course_name="Python")
+        self.student = make_student(1)
+
+    def test_map_is_cached_and_invalidated(self):
+        self.assertEqual(get_enrollment_map(self.student.pk), {})
+        with self.assertNumQueries(0):
+            get_enrollment_map(self.student.pk)
+
+        enrollment = StudentCourse.objects.create(student=self.student, course=self.course)
+        self.assertEqual(get_enrollment_map(self.student.pk), {self.course.pk: "PENDING"})
+
+        enrollment.status = "APPROVED"
+        enrollment.save()
+        self.assertEqual(get_enrollment_map(self.student.pk), {self.course.pk: "APPROVED"})
+
+        enrollment.delete()
+        self.assertEqual(get_enrollment_map(self.student.pk), {})
+
+    def test_purchase_page_shows_status(self):
+        StudentCourse.objects.create(student=self.student, course=self.course, status="APPROVED")
+        self.client.force_login(self.student)
+        response = self.client.get(reverse("purchase_course"))
+        self.assertContains(response, "Approved")
+        self.assertContains(response, f'id="course_{self.course.pk}" data-price="0" disabled')
+
+
+class CurrentDateTests(TestCase):
+    @override_settings(TIME_ZONE="Asia/Kolkata")
+    def test_date_follows_time_zone(self):
+        # 20:00 UTC is already the next day in India
+        moment = datetime(2026, 3, 1, 20, 0, tzinfo=dt_timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=moment):
+            self.assertEqual(str(current_date(None)["current_date"]), "02/03/2026")
+
+    def test_dashboard_shows_date(self):
+        self.client.force_login(make_student(1))
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertContains(response, f"Today: {timezone.localdate().strftime('%d/%m/%Y')}")
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class MailQueueTests(TestCase):
+    def test_registration_queues_welcome_email(self):
+        dept = Department.objects.create(dept_name="CS", dept_description="")
+        response = self.client.post(reverse("registration"), {
+            "first_name": "Asha", "last_name": "Nair", "email": "asha@example.com",
+            "std_reg_no": "REG0001", "std_dept": dept.pk, "std_year_of_admission": 2025,
+            "password1": "a-Strong-pass-123", "password2": "a-Strong-pass-123",
+        })
+        self.assertRedirects(response, reverse("login"))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().recipients, "asha@example.com")
+
+        sent, failed = send_queued_mail()
+        self.assertEqual((sent, failed), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["asha@example.com"])
+        self.assertEqual(OutboundEmail.objects.get().status, "SENT")
+
+    def test_failures_back_off_then_give_up(self):
+        email = queue_email("Hi", "Body", ["x@example.com"])
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("down")), \
+                self.assertLogs("student.mail", "WARNING"):
+            self.assertEqual(send_queued_mail(max_attempts=2, retry_delay=60), (0, 0))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("PENDING", 1))
+            self.assertGreater(email.send_after, timezone.now())
+
+            OutboundEmail.objects.update(send_after=timezone.now())
+            self.assertEqual(send_queued_mail(max_attempts=2), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.status, "FAILED")
+            self.assertEqual(email.last_error, "down")
+
+    def test_claim_is_committed_before_sending(self):
+        first = queue_email("One", "Body", ["one@example.com"])
+        second = queue_email("Two", "Body", ["two@example.com"])
+        statuses = []
+        # TestCase wraps every test in atomic blocks of its own
+        depth = len(connection.atomic_blocks)
+
+        def send(message):
+            # The whole batch is already claimed, outside any transaction
+            statuses.append((len(connection.atomic_blocks), sorted(
+                OutboundEmail.objects.values_list("status", flat=True)
+            )))
+            if message.subject == "Two":
+                raise OSError("down")
+            return 1
+
+        with mock.patch("django.core.mail.EmailMessage.send", autospec=True, side_effect=send), \
+                self.assertLogs("student.mail", "WARNING"):
+            self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual(statuses[0], (depth, ["SENDING", "SENDING"]))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, second.status, second.attempts), ("SENT", "PENDING", 1))
+        self.assertEqual(get_counters()[EMAIL_QUEUE_DEPTH], 1)
+
+    def test_abandoned_claims_are_sent_again(self):
+        queue_email("Hi", "Body", ["x@example.com"])
+        OutboundEmail.objects.update(status="SENDING", attempts=1, send_after=timezone.now())
+        self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual(OutboundEmail.objects.get().attempts, 2)
+
+        queue_email("Hi", "Body", ["y@example.com"])
+        OutboundEmail.objects.filter(status="PENDING").update(
+            status="SENDING", attempts=2, send_after=timezone.now()
+        )
+        self.assertEqual(send_queued_mail(max_attempts=2), (0, 1))
+        self.assertEqual(OutboundEmail.objects.last().status, "FAILED")
+        self.assertEqual(get_counters()[EMAIL_QUEUE_DEPTH], 0)
+
+
+def make_image(name="pic.png", size=(800, 600), mode="RGBA"):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128)).save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class ProfilePicturePipelineTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.staging_root, ignore_errors=True)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_STAGING_ROOT=self.staging_root,
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            },
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.student = make_student(1)
+        self.client.force_login(self.student)
+
+    def upload(self):
+        return self.client.post(
+            reverse("student_profile"), {"update_type": "profile_pic", "std_pic": make_image()}
+        )
+
+    def test_storage_is_built_on_first_use(self):
+        storage = profile_picture_storage()
+        self.assertTrue(isinstance(storage, Storage))
+        self.assertIs(storage._wrapped, empty)
+        self.assertFalse(storage.exists("missing.jpg"))
+        self.assertIsInstance(storage, FileSystemStorage)
+
+    def test_upload_is_staged_not_published(self):
+        self.assertRedirects(self.upload(), reverse("student_profile"))
+        job = ProfilePictureUpload.objects.get()
+        self.assertEqual(job.status, "PENDING")
+        self.assertTrue(staging_storage().exists(job.staged_name))
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.std_pic)
+
+    def test_worker_renders_publishes_and_replaces(self):
+        self.upload()
+        self.assertEqual(process_pending_uploads(), (1, 0))
+        first = ProfilePictureUpload.objects.get()
+        storage = profile_picture_storage()
+        self.assertEqual(set(first.renditions), {"large", "medium", "small"})
+        with storage.open(first.renditions["small"]) as f, Image.open(f) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (64, 64)))
+        self.assertFalse(staging_storage().exists(first.staged_name))
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.std_pic.name, first.renditions["large"])
+        self.assertEqual(self.student.std_pic_small_url, storage.url(first.renditions["small"]))
+
+        # A second upload deletes every rendition of the first one
+        self.upload()
+        self.assertEqual(process_pending_uploads(), (1, 0))
+        for name in first.renditions.values():
+            self.assertFalse(storage.exists(name))
+        first.refresh_from_db()
+        self.assertEqual(first.renditions, {})
+
+    @override_settings(MEDIA_PROCESS_INLINE=True)
+    def test_inline_mode_publishes_without_staging(self):
+        response = self.client.post(
+            reverse("student_profile"), {"update_type": "profile_pic", "std_pic": make_image()}, follow=True
+        )
+        self.assertContains(response, "Profile picture updated!")
+        job = ProfilePictureUpload.objects.get()
+        self.assertEqual((job.status, job.staged_name), ("DONE", ""))
+        self.assertEqual(staging_storage().listdir("")[1], [])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.std_pic.name, job.renditions["large"])
+        self.assertEqual(process_pending_uploads(), (0, 0))
+
+    def test_broken_image_fails_after_max_attempts(self):
+        self.client.post(reverse("student_profile"), {
+            "update_type": "profile_pic",
+            "std_pic": SimpleUploadedFile("pic.png", b"not an image", content_type="image/png"),
+        })
+        with self.assertLogs("student.media", "WARNING"):
+            self.assertEqual(process_pending_uploads(max_attempts=2), (0, 0))
+            self.assertEqual(process_pending_uploads(max_attempts=2), (0, 1))
+        self.assertEqual(ProfilePictureUpload.objects.get().status, "FAILED")
+
+    def test_database_error_fails_only_its_own_job(self):
+        self.upload()
+        self.upload()
+        first, second = ProfilePictureUpload.objects.all()
+        save = Student.save
+
+        def save_once_failing(student, *args, **kwargs):
+            if not failures:
+                failures.append(student.pk)
+                raise DatabaseError("connection lost")
+            return save(student, *args, **kwargs)
+
+        failures = []
+        with mock.patch.object(Student, "save", save_once_failing), self.assertLogs("student.media", "WARNING"):
+            self.assertEqual(process_pending_uploads(), (1, 0))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        # The failed attempt is recorded and the job waits for the next run
+        self.assertEqual((first.status, first.attempts, first.last_error), ("PENDING", 1, "connection lost"))
+        self.assertEqual(second.status, "DONE")
+        self.assertEqual(len(profile_picture_storage().listdir(f"student_pic/{self.student.pk}")[1]), 3)
+
+    def test_abandoned_claims_are_processed_again(self):
+        self.upload()
+        claimed_at = timezone.now() - timedelta(hours=1)
+        ProfilePictureUpload.objects.update(status="PROCESSING", claimed_at=claimed_at, attempts=1)
+        self.assertEqual(process_pending_uploads(), (1, 0))
+        self.assertEqual(ProfilePictureUpload.objects.get().attempts, 2)
+
+        self.upload()
+        ProfilePictureUpload.objects.filter(status="PENDING").update(
+            status="PROCESSING", claimed_at=claimed_at, attempts=3
+        )
+        self.assertEqual(process_pending_uploads(max_attempts=3), (0, 0))
+        self.assertEqual(ProfilePictureUpload.objects.last().status, "FAILED")
+
+    def test_students_list_uses_cached_thumbnail_urls(self):
+        self.upload()
+        process_pending_uploads()
+        self.student.refresh_from_db()
+        principal = Student.objects.create_user(
+            username="head@example.com", email="head@example.com", password="x",
+            first_name="Head", last_name="Master", std_reg_no="PRIN0001", role="PRINCIPAL",
+        )
+        self.client.force_login(principal)
+        with mock.patch("django.core.files.storage.FileSystemStorage.url") as url:
+            response = self.client.get(reverse("students_list"))
+        url.assert_not_called()
+        self.assertContains(response, self.student.std_pic_small_url)
+
+    def test_backfill_stages_pictures_without_thumbnails(self):
+        name = profile_picture_storage().save("student_pic/old.png", make_image())
+        Student.objects.filter(pk=self.student.pk).update(std_pic=name)
+        self.assertEqual(stage_existing_pictures(), 1)
+        # Already queued, so a second run stages nothing
+        self.assertEqual(stage_existing_pictures(), 0)
+        self.assertEqual(process_pending_uploads(), (1, 0))
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.std_pic_medium_url)
+        self.assertFalse(profile_picture_storage().exists(name))
+
+
+class ImportStudentsTests(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(dept_name="Physics", dept_description="")
+        make_student(1)
+
+    def csv(self, *rows):
+        header = "first_name,last_name,email,std_reg_no,std_dept,password,std_age\n"
+        return StringIO(header + "".join(row + "\n" for row in rows))
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        report = StringIO()
+        result = import_students(self.csv(
+            "Ann,Lee,ann@example.com,R100,physics,s3cret-pass,20",
+            "Dup,Email,student1@example.com,R101,,,",
+            "Dup,Reg,dup@example.com,R100,,,",
+            "Bad,Age,age@example.com,R102,,,9",
+            "Bob,Ray,bob@example.com,R103,Chemistry,,",
+            "Cy,Fox,cy@example.com,R104,,,",
+        ), chunk_size=2, report=report)
+
+        self.assertEqual((result["rows"], result["created"], result["failed"]), (6, 2, 4))
+        self.assertEqual([line for line, _ in result["errors"]], [3, 4, 5, 6])
+        self.assertIn("already registered", result["errors"][0][1])
+        self.assertEqual(len(report.getvalue().splitlines()), 5)
+
+        ann = Student.objects.get(std_reg_no="R100")
+        self.assertEqual((ann.username, ann.std_dept, ann.role), ("ann@example.com", self.dept, "STUDENT"))
+        self.assertTrue(ann.check_password("s3cret-pass"))
+        self.assertFalse(Student.objects.get(std_reg_no="R104").has_usable_password())
+
+    def test_hashes_in_worker_processes(self):
+        result = import_students(self.csv(
+            "Ann,Lee,ann@example.com,R100,,pass-one,",
+            "Bob,Ray,bob@example.com,R101,,pass-two,",
+        ), workers=2)
+        self.assertEqual(result["created"], 2)
+        self.assertTrue(Student.objects.get(std_reg_no="R101").check_password("pass-two"))
+
+    def test_few_passwords_skip_the_pool(self):
+        with mock.patch("concurrent.futures.ProcessPoolExecutor") as pool:
+            result = import_students(self.csv("Ann,Lee,ann@example.com,R100,,pass-one,"), workers=4)
+        self.assertEqual(result["created"], 1)
+        pool.assert_not_called()
+
+    def test_rows_registered_meanwhile_are_rejected(self):
+        # Another request registers REG0001 after the uniqueness check
+        with mock.patch("student.importer._taken", side_effect=[(set(), set()), _taken(set(), {"REG0001"})]):
+            result = import_students(self.csv(
+                "Ann,Lee,ann@example.com,R100,,,",
+                "Raced,Row,raced@example.com,REG0001,,,",
+            ))
+        self.assertEqual((result["created"], result["failed"]), (1, 1))
+        self.assertEqual(result["errors"][0][0], 3)
+        self.assertIn("already registered", result["errors"][0][1])
+        self.assertTrue(Student.objects.filter(std_reg_no="R100").exists())
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, "std_reg_no"):
+            import_students(StringIO("first_name,last_name,email\n"))
+
+
+class InstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        self.client.force_login(self.student)
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_TRACE_MEMORY=True)
+    def test_records_timing_queries_and_memory(self):
+        with self.assertLogs("instrumentation", "INFO") as logs:
+            response = self.client.get(reverse("student_dashboard"))
+        self.assertRegex(response["Server-Timing"], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+$')
+        metrics = json.loads(logs.records[0].getMessage())
+        self.assertEqual(metrics["view"], "student_dashboard")
+        self.assertGreater(metrics["queries"], 0)
+        self.assertGreater(metrics["template_ms"], 0)
+        self.assertGreater(metrics["peak_memory_kib"], 0)
+
+    def test_flags_duplicate_queries(self):
+        from .middleware import QueryRecorder
+        recorder = QueryRecorder()
+        execute = lambda sql, params, many, context: None
+        for student_id in (1, 1, 2):
+            recorder(execute, "SELECT 1 WHERE id = %s", (student_id,), False, {})
+        self.assertEqual((recorder.count, recorder.duplicates, recorder.similar), (3, 1, 2))
+
+    def test_profiles_matching_paths(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        with override_settings(
+            INSTRUMENTATION_ENABLED=True,
+            INSTRUMENTATION_PROFILE_PATHS=r"^/student-dashboard/",
+            INSTRUMENTATION_PROFILE_DIR=profile_dir,
+        ), self.assertLogs("instrumentation", "INFO") as logs:
+            self.client.get(reverse("student_dashboard"))
+            self.client.get(reverse("student_profile"))
+        profiled = [json.loads(record.getMessage()).get("profile") for record in logs.records]
+        self.assertTrue(profiled[0].endswith(".prof"))
+        self.assertIsNone(profiled[1])
+
+    @override_settings(INSTRUMENTATION_ENABLED=True)
+    def test_template_timing_is_patched_in_only_during_requests(self):
+        from django.template.base import Template
+        from .middleware import _original_template_render
+
+        with self.assertLogs("instrumentation", "INFO") as logs:
+            self.client.get(reverse("student_dashboard"))
+        self.assertGreater(json.loads(logs.records[0].getMessage())["template_ms"], 0)
+        self.assertIs(Template.render, _original_template_render)
+
+    def test_one_request_is_profiled_at_a_time(self):
+        from .middleware import _profile_lock
+
+        with override_settings(
+            INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_PROFILE_PATHS=r"^/student-dashboard/",
+        ), self.assertLogs("instrumentation", "INFO") as logs:
+            # Another request is being profiled
+            with _profile_lock:
+                response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("profile", json.loads(logs.records[0].getMessage()))
+
+
+class AsyncDashboardTests(TestCase):
+    def test_matches_sync_dashboard(self):
+        student = make_student(1)
+        course = AddOnCourse.objects.create(course_id="C1", course_name="Python", course_price=500)
+        StudentCourse.objects.create(student=student, course=course, status="APPROVED")
+        request = RequestFactory().get("/")
+
+        async def auser():
+            return student
+
+        request.auser = auser
+        response = async_to_sync(async_views.student_dashboard)(request)
+        self.assertContains(response, "Python")
+        self.assertContains(response, "Welcome, Student1!")
+
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir, ignore_errors=True)
+        settings_override = override_settings(METRICS_DIR=self.metrics_dir, METRICS_TOKEN="s3cret")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.course = AddOnCourse.objects.create(course_id="C1", course_name="Python")
+        self.student = make_student(1)
+
+    def scrape(self, **headers):
+        response = self.client.get(reverse("metrics"), headers=headers)
+        self.assertEqual(response.status_code, 200)
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requires_staff_or_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.scrape(Authorization="Bearer s3cret")
+        self.client.force_login(Student.objects.create_user(
+            username="staff@example.com", password="pw", std_reg_no="STAFF1", is_staff=True,
+        ))
+        self.scrape()
+
+    def test_workflow_gauges_follow_enrollments_and_approvals(self):
+        enroll_courses(self.student, [self.course.id])
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(samples["student_course_pending"], 1)
+        self.assertEqual(samples["email_queue_depth"], 0)
+
+        decide_requests("approve", course_id=self.course.id)
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(samples["student_course_pending"], 0)
+        self.assertEqual(samples["email_queue_depth"], 1)
+        self.assertEqual(samples["course_approvals_total"], 1)
+        self.assertEqual(samples["registrations_total"], 1)
+
+        send_queued_mail()
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(samples["email_queue_depth"], 0)
+        self.assertEqual(samples['emails_total{result="sent"}'], 1)
+
+    def test_request_metrics(self):
+        self.client.force_login(self.student)
+        self.client.get(reverse("student_dashboard"))
+        self.client.get(reverse("student_dashboard"))
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(
+            samples['http_requests_total{method="GET",status="2xx",view="student_dashboard"}'], 2
+        )
+        self.assertEqual(
+            samples['http_request_duration_seconds_count{method="GET",view="student_dashboard"}'], 2
+        )
+        self.assertGreater(samples['db_queries_total{view="student_dashboard"}'], 0)
+
+    def test_async_requests_count_queries_from_executor_threads(self):
+        def query():
+            try:
+                with connections["default"].cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            finally:
+                connections.close_all()
+
+        async def view(request):
+            # The ORM runs in a worker thread with its own connection
+            await sync_to_async(query, thread_sensitive=False)()
+            return HttpResponse()
+
+        async_to_sync(MetricsMiddleware(view))(RequestFactory().get("/"))
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(samples['db_queries_total{view="unmatched"}'], 1)
+
+    def test_cache_hit_ratio(self):
+        cache.clear()
+        get_enrollment_map(self.student.pk)
+        get_enrollment_map(self.student.pk)
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(samples['cache_hit_ratio{cache="enrollment_map"}'], 0.5)
+
+    def test_merges_every_process(self):
+        # Another worker's flushed counters
+        other = {"counters": {'["emails_total", [["result", "sent"]]]': 4}, "histograms": {}, "events": {}}
+        with open(f"{self.metrics_dir}/metrics-0.json", "w") as f:
+            json.dump(other, f)
+        registry.inc("emails_total", 2, result="sent")
+        samples = self.scrape(Authorization="Bearer s3cret")
+        self.assertEqual(samples['emails_total{result="sent"}'], 6)
+
+    def test_exited_processes_are_folded_into_the_aggregate(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        other = {"counters": {'["emails_total", [["result", "sent"]]]': 4}, "histograms": {}, "events": {}}
+        with open(f"{self.metrics_dir}/metrics-{process.pid}-abc123.json", "w") as f:
+            json.dump(other, f)
+        for _ in range(2):
+            samples = self.scrape(Authorization="Bearer s3cret")
+            self.assertEqual(samples['emails_total{result="sent"}'], 4)
+        self.assertFalse(os.path.exists(f"{self.metrics_dir}/metrics-{process.pid}-abc123.json"))
+        self.assertTrue(os.path.exists(f"{self.metrics_dir}/metrics-aggregate.json"))
+
+    def test_counters_sum_their_shards(self):
+        for _ in range(40):
+            adjust_counters({PENDING_ENROLLMENTS: 1})
+        self.assertGreater(WorkflowCounter.objects.filter(name=PENDING_ENROLLMENTS).count(), 1)
+        self.assertEqual(get_counters()[PENDING_ENROLLMENTS], 40)
+        recount()
+        self.assertEqual(WorkflowCounter.objects.filter(name=PENDING_ENROLLMENTS).count(), SHARDS)
+        self.assertEqual(get_counters()[PENDING_ENROLLMENTS], 0)
+        # Every shard exists, so a write never needs an INSERT
+        with self.assertNumQueries(1):
+            adjust_counters({PENDING_ENROLLMENTS: 1})
+
+
+@override_settings(
+    USER_CACHE_ENABLED=True,
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.student = make_student(1)
+        self.client.force_login(self.student)
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse("student_dashboard")).status_code, 200)
+        return [
+            query["sql"] for query in queries
+            if '"django_session"' in query["sql"] or 'FROM "student_student"' in query["sql"]
+        ]
+
+    def test_steady_state_requests_need_no_auth_queries(self):
+        self.auth_queries()
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_snapshot_loads_the_rest_of_the_row_at_once(self):
+        user = get_cached_user(self.student.pk)
+        self.assertEqual(user.role, "STUDENT")
+        self.assertIn("email", user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.std_phone_no), (self.student.email, None))
+
+    def test_snapshot_holds_the_session_hash_not_the_password(self):
+        self.auth_queries()
+        snapshot = cache.get(f"student:user:{self.student.pk}")
+        self.assertNotIn("password", snapshot["fields"])
+        self.assertEqual(snapshot["session_auth_hash"], self.student.get_session_auth_hash())
+
+        user = get_cached_user(self.student.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.get_session_auth_hash(), self.student.get_session_auth_hash())
+        user.set_password("changed-password")
+        self.assertNotEqual(user.get_session_auth_hash(), snapshot["session_auth_hash"])
+
+    def test_profile_save_and_logout_drop_the_snapshot(self):
+        self.auth_queries()
+        self.client.post(reverse("student_profile"), {
+            "update_type": "profile_info",
+            "first_name": "Renamed",
+            "last_name": "Test",
+            "std_year_of_admission": 2024,
+        })
+        self.assertEqual(get_cached_user(self.student.pk).first_name, "Renamed")
+
+        self.client.get(reverse("logout"))
+        self.assertIsNone(cache.get(f"student:user:{self.student.pk}"))
+        self.assertEqual(self.client.get(reverse("student_dashboard")).status_code, 302)
@@ -1,6 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Access policy read by middleware.AccessPolicyMiddleware
+required_role = 'STUDENT'
+public_routes = {'landing', 'login', 'logout', 'registration'}
+
+# ASYNC_VIEWS serves the dashboard from an async view (under ASGI)
+if settings.ASYNC_VIEWS:
+    from . import async_views as dashboard_views
+else:
+    dashboard_views = views
+
 urlpatterns = [
     path('', views.landing, name='landing'),
     path('login/',views.login, name='login' ),
@@ -8,6 +19,6 @@ urlpatterns = [
     path('registration/',views.registration, name='registration' ),
     path('student-purchase-course/', views.purchase_course, name='purchase_course'),
     path('student-profile/', views.student_profile, name='student_profile'),
-    path('student-dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('student-dashboard/', dashboard_views.student_dashboard, name='student_dashboard'),
     
 ]  
\ No newline at end of file
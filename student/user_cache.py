@@ -0,0 +1,91 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from metrics import registry
+from .models import Student
+
+# Columns kept for a signed-in user: what the access policy and the page
+# chrome read. The rest of the row is deferred and loaded, in one query,
+# the first time a view touches any of it. The password hash is never
+# cached; the snapshot carries the session auth hash (an HMAC of it) for
+# the session check instead.
+SNAPSHOT_FIELDS = frozenset({
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "role",
+    "std_reg_no",
+    "std_dept_id",
+    "std_pic",
+    "std_pic_small_url",
+    "std_pic_medium_url",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+})
+
+
+def _user_key(user_id):
+    return f"student:user:{user_id}"
+
+
+def _snapshot_attnames():
+    # from_db() expects the loaded columns in model order
+    return [f.attname for f in Student._meta.concrete_fields if f.attname in SNAPSHOT_FIELDS]
+
+
+def get_cached_user(user_id):
+    """Return the user with only SNAPSHOT_FIELDS loaded, or None if they are gone.
+
+    The snapshot is cached until the user is saved, deleted or logs out,
+    so steady-state requests identify the user without a query.
+    """
+    key = _user_key(user_id)
+    attnames = _snapshot_attnames()
+    snapshot = cache.get(key)
+    # A snapshot cached by a build with other SNAPSHOT_FIELDS is a miss
+    if snapshot is not None and list(snapshot.get("fields", ())) != attnames:
+        snapshot = None
+    registry.inc("cache_requests_total", cache="user", result="miss" if snapshot is None else "hit")
+    if snapshot is None:
+        loaded = _load_with_password(user_id, attnames)
+        if loaded is None:
+            return None
+        snapshot = {
+            "fields": {attname: getattr(loaded, attname) for attname in attnames},
+            "session_auth_hash": loaded.get_session_auth_hash(),
+        }
+        cache.set(key, snapshot, settings.USER_CACHE_TIMEOUT)
+    user = Student.from_db(DEFAULT_DB_ALIAS, attnames, list(snapshot["fields"].values()))
+    user.cached_session_auth_hash = snapshot["session_auth_hash"]
+    return user
+
+
+def _load_with_password(user_id, attnames):
+    # The password is only read to compute the session auth hash
+    loaded = [f.attname for f in Student._meta.concrete_fields if f.attname in {"password", *attnames}]
+    values = Student._default_manager.filter(pk=user_id).values_list(*loaded).first()
+    if values is None:
+        return None
+    return Student.from_db(DEFAULT_DB_ALIAS, loaded, values)
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+class CachedUserBackend(ModelBackend):
+    """ModelBackend that loads session users through get_cached_user()"""
+
+    def get_user(self, user_id):
+        if not settings.USER_CACHE_ENABLED:
+            return super().get_user(user_id)
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
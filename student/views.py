@@ -4,11 +4,14 @@ from django.contrib.auth import authenticate, login as auth_login, logout as aut
 from django.contrib.auth.decorators import login_required
 from .models import StudentCourse
 from .form import StudentForm, StudentProfileForm, StudentProfilePictureForm
-from principal.models import AddOnCourse
-from django.core.paginator import Paginator
-from django.core.mail import send_mail
-from django.conf import settings
-from cloudinary_storage.storage import MediaCloudinaryStorage
+from .summary import get_summary
+from .enrollment import enroll_courses
+from .enrollment_map import get_enrollment_map
+from principal.catalog import catalog_version, get_catalog_page
+from .mail import queue_email
+from .media import stage_profile_picture
+
+COURSES_PER_PAGE = 5
 
 # Handle landing page request
 def landing(request):
@@ -68,19 +71,18 @@ def registration(request):
             user = form.save(commit=False)
             user.username = form.cleaned_data["email"]
             user.role = "STUDENT"
+            # The picture is resized and uploaded by the media worker
+            std_pic = form.cleaned_data.get("std_pic")
+            user.std_pic = None
             user.save()
-            try:
-                # Send welcome email to new user
-                send_welcome_email(user)
-                messages.success(
-                    request,
-                    "Registration successful! A welcome email has been sent to your inbox.",
-                )
-            except Exception as e:
-                messages.success(
-                    request,
-                    f"Registration successful! (Note: Welcome email could not be sent)",
-                )
+            if std_pic:
+                stage_profile_picture(user, std_pic)
+            # Queue the welcome email; the send_queued_mail worker delivers it
+            queue_welcome_email(user)
+            messages.success(
+                request,
+                "Registration successful! A welcome email is on its way to your inbox.",
+            )
             return redirect("login")
         else:
             messages.error(request, "Please correct the errors below.")
@@ -90,9 +92,8 @@ def registration(request):
     return render(request, "registration.html", {"form": form})
 
 
-# Send welcome email to newly registered users
-def send_welcome_email(user):
-    #Send simple welcome email
+# Queue welcome email for newly registered users
+def queue_welcome_email(user):
     subject = f"Welcome to Student Management System, {user.first_name}!"
 
     message = f"""
@@ -107,13 +108,7 @@ Account Details:
 • Username/Email: {user.email}
 """
 
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        fail_silently=True,
-    )
+    queue_email(subject, message, [user.email])
 
 
 # Handle course purchase requests (requires login)
@@ -123,17 +118,9 @@ def purchase_course(request):
     if request.method == "POST":
         selected_course_ids = request.POST.getlist("selected_courses")
         if selected_course_ids:
-            # Get selected course objects from database
-            courses = AddOnCourse.objects.filter(id__in=selected_course_ids)
-            created_count = 0
-
-            # Create course enrollment for each selected course
-            for course in courses:
-                created = StudentCourse.objects.get_or_create(
-                    student=request.user, course=course, defaults={"status": "PENDING"}
-                )
-                if created:
-                    created_count += 1
+            # Insert all requested enrollments in one statement, skipping
+            # courses this student has already requested
+            created_count = enroll_courses(request.user, selected_course_ids)
 
             # Show success message with count of new requests
             if created_count > 0:
@@ -146,23 +133,22 @@ def purchase_course(request):
         else:
             messages.error(request, "Please select at least one course.")
 
-    # For GET requests, show available courses
-    all_courses = AddOnCourse.objects.all()
-    student_courses = StudentCourse.objects.filter(student=request.user)
-    purchased_course_ids = list(student_courses.values_list("course_id", flat=True))
-    paginator = Paginator(all_courses, 5)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-    # Render purchase page with course data
+    # For GET requests, show a page of the cached course catalog
+    page_obj = get_catalog_page(
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=COURSES_PER_PAGE,
+    )
+    # Render purchase page with course data and the cached status map
     return render(
         request,
         "purchase_course.html",
         {
             "courses": page_obj,
-            "count": all_courses.count(),
-            "purchased_course_ids": purchased_course_ids,
-            "total_courses": paginator.count,
-            "student_courses": {sc.course_id: sc.status for sc in student_courses},
+            "count": page_obj.count,
+            "total_courses": page_obj.count,
+            "enrollment_map": get_enrollment_map(request.user.pk),
+            "catalog_version": catalog_version(),
         },
     )
 
@@ -176,18 +162,19 @@ def student_profile(request):
         if update_type == "profile_pic":
             form = StudentProfilePictureForm(request.POST, request.FILES)
             if form.is_valid():
-                std_pic = form.cleaned_data['std_pic']
-
-                # Use Cloudinary storage to delete old picture safely
-                if request.user.std_pic:
-                    storage = MediaCloudinaryStorage()
-                    storage.delete(request.user.std_pic.name)  # deletes from Cloudinary
-
-                # Save new picture
-                request.user.std_pic = std_pic
-                request.user.save()
-
-                messages.success(request, "Profile picture updated successfully!")
+                # Stage the file; the media worker resizes it, publishes it
+                # and deletes the old picture in the background
+                upload = stage_profile_picture(request.user, form.cleaned_data['std_pic'])
+
+                if upload.status == "DONE":
+                    messages.success(request, "Profile picture updated!")
+                elif upload.status == "FAILED":
+                    messages.error(request, "Your picture could not be processed. Please try another image.")
+                else:
+                    messages.success(
+                        request,
+                        "Profile picture uploaded! It will appear once processing finishes.",
+                    )
             else:
                 for field, errors in form.errors.items():
                     for error in errors:
@@ -224,7 +211,7 @@ def student_dashboard(request):
         student_course_id = request.POST.get("student_course_id")
         try:
             # Find and remove the enrolled course
-            student_course = StudentCourse.objects.get(
+            student_course = StudentCourse.objects.select_related("course").get(
                 id=student_course_id, student=request.user
             )
             course_name = student_course.course.course_name
@@ -238,39 +225,29 @@ def student_dashboard(request):
             messages.error(request, f"Error removing course: {str(e)}")
         return redirect("student_dashboard")
 
-    # Get approved courses for display
-    approved_purchases = StudentCourse.objects.filter(
-        student=request.user, status="APPROVED"
-    ).select_related("course", "course__department")
-
-    # Get pending courses for status display
-    pending_purchases = StudentCourse.objects.filter(
-        student=request.user, status="PENDING"
-    ).select_related("course", "course__department")
-
-    # Get rejected courses for status display
-    rejected_purchases = StudentCourse.objects.filter(
-        student=request.user, status="REJECTED"
-    ).select_related("course", "course__department")
-
-    # Calculate dashboard statistics
-    total_courses_bought = approved_purchases.count()
-    total_amount_spent = (
-        sum(sc.course.course_price for sc in approved_purchases)
-        if approved_purchases.exists()
-        else 0
+    # Load every enrollment once and split by status in Python
+    purchases = list(
+        StudentCourse.objects.filter(student=request.user).select_related(
+            "course", "course__department"
+        )
     )
+    approved_purchases = [sc for sc in purchases if sc.status == "APPROVED"]
+    pending_purchases = [sc for sc in purchases if sc.status == "PENDING"]
+    rejected_purchases = [sc for sc in purchases if sc.status == "REJECTED"]
+
+    # Dashboard statistics come from the maintained summary row
+    summary = get_summary(request.user)
 
     # Prepare context data for template
     context = {
         "courses": approved_purchases,
-        "approved_courses": approved_purchases.count(),
-        "pending_courses": pending_purchases.count(),
-        "rejected_courses": rejected_purchases.count(),
+        "approved_courses": summary.approved_count,
+        "pending_courses": summary.pending_count,
+        "rejected_courses": summary.rejected_count,
         "pending_purchases": pending_purchases,
         "rejected_purchases": rejected_purchases,
-        "total_courses_bought": total_courses_bought,
-        "total_amount_spent": total_amount_spent,
+        "total_courses_bought": summary.approved_count,
+        "total_amount_spent": summary.approved_spend,
         "in_progress_courses": 0,
         "completed_courses": 0,
         
@@ -12,9 +12,10 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 from decouple import config
-import dj_database_url
 import os
 
+from database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +31,10 @@ DEBUG = config('DEBUG' , cast = bool)
 
 ALLOWED_HOSTS = ["*"]
 
+# Cold-start mode for serverless platforms (Vercel sets VERCEL=1): every
+# instance is short-lived, so skip startup work it may never use
+SERVERLESS = config('SERVERLESS', default='VERCEL' in os.environ, cast=bool)
+
 
 # Application definition
 
@@ -42,13 +47,25 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'student',
     'principal',
-    'cloudinary',
-    'cloudinary_storage',
 ]
 
+if not SERVERLESS:
+    # Only needed for their template tags and management commands; the media
+    # storage imports the Cloudinary SDK itself on first use
+    INSTALLED_APPS += ['cloudinary', 'cloudinary_storage']
+
 AUTH_USER_MODEL = 'student.Student'
 
+# The cached backend authenticates like ModelBackend; ModelBackend stays
+# listed so sessions created before the switch remain valid
+AUTHENTICATION_BACKENDS = [
+    'student.user_cache.CachedUserBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 MIDDLEWARE = [
+    'student.middleware.InstrumentationMiddleware',
+    'metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
 
@@ -59,8 +76,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
-    'student.middleware.DateMiddleware',
-    'middleware.RedirectMiddleware',
+    'middleware.AccessPolicyMiddleware',
 ]
 
 
@@ -70,12 +86,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': ['templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'student.context_processors.current_date',
+                'student.context_processors.fragment_cache',
+            ],
+            # Compile each template once per process; the autoreloader
+            # still resets this cache when a template changes under DEBUG
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -87,15 +112,79 @@ WSGI_APPLICATION = 'student_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+DATABASE_URL = config("DATABASE_URL")
+
+# persistent, native (psycopg pool) or external (local pooler such as
+# PgBouncer); see database.POOL_MODES. native needs psycopg[binary,pool]
+# installed, which requirements.txt does not ship
+DB_POOL = config('DB_POOL', default='persistent')
+
+# A frozen serverless instance cannot close its connections, so they would
+# pile up on the server until it times them out; there, connect per request
+# unless DB_POOL=external puts a pooler in between
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0 if SERVERLESS else 600, cast=int)
+
+# Required from PostgreSQL by default, except through a local pooler
+DB_SSL_REQUIRE = config('DB_SSL_REQUIRE', default=DB_POOL != 'external', cast=bool)
+
+# Size of the native pool in each worker process. Keep
+# workers * DB_POOL_MAX_SIZE below the server's max_connections.
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=4, cast=int)
+
+# Seconds a request waits for a pooled connection before failing
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
+
+# Seconds an idle pooled connection above DB_POOL_MIN_SIZE is kept
+DB_POOL_MAX_IDLE = config('DB_POOL_MAX_IDLE', default=300, cast=float)
+
 DATABASES = {
-    "default": dj_database_url.parse(
-        config("DATABASE_URL"),
-        conn_max_age=600,
-        ssl_require=True
+    "default": database_settings(
+        DATABASE_URL,
+        DB_POOL,
+        conn_max_age=DB_CONN_MAX_AGE,
+        ssl_require=DB_SSL_REQUIRE,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        max_idle=DB_POOL_MAX_IDLE,
     )
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='student-management'),
+    }
+}
+
+# Whether all workers share one cache. Invalidating a key only reaches
+# other workers through a shared cache; LocMemCache is per process.
+SHARED_CACHE = 'locmem' not in CACHES['default']['BACKEND']
+
+# Seconds the dashboard snapshot, course catalog and enrollment maps are
+# cached. Writes invalidate them at once in a shared cache; a per-process
+# cache keeps them short so other workers catch up quickly.
+DATA_CACHE_TIMEOUT = config('DATA_CACHE_TIMEOUT', default=60 * 60 if SHARED_CACHE else 30, cast=int)
+
+# Sessions and signed-in users are read from the cache. That is only safe
+# with a shared cache (a logout in one worker must reach the others), so
+# both default to off with LocMemCache.
+SESSION_ENGINE = config(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db',
+)
+
+USER_CACHE_ENABLED = config('USER_CACHE_ENABLED', default=SHARED_CACHE, cast=bool)
+
+# Seconds a user snapshot is kept; saves and logouts drop it sooner
+USER_CACHE_TIMEOUT = config('USER_CACHE_TIMEOUT', default=15 * 60, cast=int)
+
+
 
 
 # Password validation
@@ -172,7 +261,73 @@ EMAIL_HOST_USER =  config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD') 
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Outbound mail queue, drained by `manage.py send_queued_mail`
+MAIL_QUEUE_BATCH_SIZE = config('MAIL_QUEUE_BATCH_SIZE', default=50, cast=int)
+MAIL_QUEUE_MAX_ATTEMPTS = config('MAIL_QUEUE_MAX_ATTEMPTS', default=5, cast=int)
+MAIL_QUEUE_RETRY_DELAY = config('MAIL_QUEUE_RETRY_DELAY', default=60, cast=int)
+# Seconds before an email claimed by a worker that died is sent again
+MAIL_QUEUE_CLAIM_TIMEOUT = config('MAIL_QUEUE_CLAIM_TIMEOUT', default=300, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# Profile picture pipeline: uploads are staged locally and processed by
+# `manage.py process_media_uploads`, then pushed to PROFILE_PICTURE_STORAGE
+MEDIA_STAGING_ROOT = config('MEDIA_STAGING_ROOT', default=str(BASE_DIR / 'media_staging'))
+PROFILE_PICTURE_STORAGE = config('PROFILE_PICTURE_STORAGE', default='default')
+MEDIA_UPLOAD_BATCH_SIZE = config('MEDIA_UPLOAD_BATCH_SIZE', default=20, cast=int)
+MEDIA_UPLOAD_MAX_ATTEMPTS = config('MEDIA_UPLOAD_MAX_ATTEMPTS', default=3, cast=int)
+# Seconds before a job claimed by a worker that died is processed again
+MEDIA_UPLOAD_CLAIM_TIMEOUT = config('MEDIA_UPLOAD_CLAIM_TIMEOUT', default=600, cast=int)
+# Render pictures inside the upload request instead. Serverless hosts
+# have no media worker and no persistent disk to stage uploads on.
+MEDIA_PROCESS_INLINE = config('MEDIA_PROCESS_INLINE', default=SERVERLESS, cast=bool)
+
+# Bulk student import (`manage.py import_students` and the principal upload page)
+STUDENT_IMPORT_CHUNK_SIZE = config('STUDENT_IMPORT_CHUNK_SIZE', default=1000, cast=int)
+# Hashing processes used by the upload page. The default, 0, hashes inside
+# the web worker rather than forking a pool from it; the management command
+# takes --workers and uses a pool by default.
+STUDENT_IMPORT_WORKERS = config('STUDENT_IMPORT_WORKERS', default=0, cast=int)
+
+# Request instrumentation (student.middleware.InstrumentationMiddleware):
+# Server-Timing headers plus one JSON log line per request when enabled
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=False, cast=bool)
+INSTRUMENTATION_TRACE_MEMORY = config('INSTRUMENTATION_TRACE_MEMORY', default=False, cast=bool)
+# Fraction of requests to run under cProfile, and a regex of paths always profiled
+INSTRUMENTATION_PROFILE_RATE = config('INSTRUMENTATION_PROFILE_RATE', default=0.0, cast=float)
+INSTRUMENTATION_PROFILE_PATHS = config('INSTRUMENTATION_PROFILE_PATHS', default='')
+INSTRUMENTATION_PROFILE_DIR = config('INSTRUMENTATION_PROFILE_DIR', default=str(BASE_DIR / 'profiles'))
+
+# Prometheus-style metrics at /metrics (metrics.py). Every process writes its
+# counters to METRICS_DIR and a scrape merges them; empty keeps them in memory.
+# Clear the directory on deploy to reset the counters.
+# Serverless file systems are read-only, so keep the counters in memory there
+METRICS_DIR = config('METRICS_DIR', default='' if SERVERLESS else str(BASE_DIR / 'metrics_data'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+# Bearer token for scrapers; staff users can always read the endpoint
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Serve the dashboards and list pages from async views; run the app under an
+# ASGI server (student_management.asgi) when enabled. INSTRUMENTATION_ENABLED
+# is sync-only and moves every request back onto a thread.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+# Give each independent query of an async view its own thread and connection
+# (never on SQLite). Without the native pool every such query opens (and
+# closes) a fresh connection, which costs more than it saves.
+ASYNC_QUERY_FANOUT = config('ASYNC_QUERY_FANOUT', default=DB_POOL == 'native', cast=bool)
+
+# Templates: compile every template when the WSGI/ASGI app starts
+# (template_warmup.py) instead of on the first request that needs it.
+# Off in serverless mode, where an instance may serve only a page or two.
+TEMPLATE_WARMUP = config('TEMPLATE_WARMUP', default=not SERVERLESS, cast=bool)
+# Seconds that {% cache %} fragments (navigation, sidebars, course cards) live
+FRAGMENT_CACHE_TIMEOUT = config(
+    'FRAGMENT_CACHE_TIMEOUT', default=60 * 60 if SHARED_CACHE else DATA_CACHE_TIMEOUT, cast=int
+)
+
+# `manage.py profile_imports` fails when starting the app imports for longer
+# than this in total, or for longer than the per-package budget in one package
+COLD_START_BUDGET_MS = config('COLD_START_BUDGET_MS', default=1000, cast=float)
+COLD_START_MODULE_BUDGET_MS = config('COLD_START_MODULE_BUDGET_MS', default=250, cast=float)
@@ -15,4 +15,11 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_management.settings')
 
 application = get_wsgi_application()
 
+from django.conf import settings  # noqa: E402
+
+if settings.TEMPLATE_WARMUP:
+    from template_warmup import warm_templates
+
+    warm_templates()
+
 app = application
\ No newline at end of file
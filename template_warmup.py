@@ -0,0 +1,63 @@
+import hashlib
+import logging
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+
+def template_files(engine):
+    """``(name, path)`` of every template ``engine`` can load, first match wins."""
+    seen = set()
+    for directory in [*engine.dirs, *get_app_template_dirs("templates")]:
+        root = Path(directory)
+        for path in sorted(root.rglob("*")):
+            name = path.relative_to(root).as_posix()
+            if path.is_file() and name not in seen:
+                seen.add(name)
+                yield name, path
+
+
+def _django_engines():
+    return [backend.engine for backend in engines.all() if isinstance(backend, DjangoTemplates)]
+
+
+@lru_cache(maxsize=None)
+def template_digest():
+    """Short hash of every template's source.
+
+    Cached fragments are keyed on it, so a deploy that changes a template
+    never serves HTML rendered by the old one, even from a shared cache.
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    for engine in _django_engines():
+        for name, path in template_files(engine):
+            digest.update(name.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def warm_templates():
+    """Compile every template into the cached loader before the first request.
+
+    Returns the number of templates compiled. Files that are not valid
+    templates (or not text) are logged and skipped.
+    """
+    started = time.perf_counter()
+    compiled = 0
+    for engine in _django_engines():
+        for name, _ in template_files(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as e:
+                logger.warning("Skipping template %s: %s", name, e)
+                continue
+            compiled += 1
+    template_digest()
+    logger.info("Compiled %d templates in %.0f ms", compiled, (time.perf_counter() - started) * 1000)
+    return compiled